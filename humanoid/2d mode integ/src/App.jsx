@@ -20,6 +20,7 @@ export default function App() {
     setAudioUrl(null);
     setImages([]); // Clear previous images
     setCurrentImageIndex(0);
+    if (imageEventsRef.current) imageEventsRef.current.close();
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
       const recorder = new MediaRecorder(stream);
@@ -54,6 +55,9 @@ export default function App() {
               
               // Start dynamic timed image display
               startImageSlideshow(data.images);
+            } else if (data.image_job_id) {
+              // Images are generated in the background and pushed as they finish
+              followImageJob(data.image_job_id);
             }
           } else {
             console.error("Invalid backend response:", data);
@@ -86,7 +90,10 @@ export default function App() {
   const slideshowTimerRef = useRef(null);
   const imageTimersRef = useRef([]);
   
-  const startImageSlideshow = (imagesData) => {
+  const imageEventsRef = useRef(null);
+  
+  // `elapsed` is how many seconds of the answer have already played
+  const startImageSlideshow = (imagesData, elapsed = 0) => {
     // Clear existing timers
     if (slideshowTimerRef.current) {
       clearInterval(slideshowTimerRef.current);
@@ -103,18 +110,38 @@ export default function App() {
       const showTimer = setTimeout(() => {
         console.log(`[${startTime}s] Showing image ${index + 1}: ${img.description} (for ${duration}s)`);
         setCurrentImageIndex(index);
-      }, startTime * 1000);
+      }, Math.max(0, startTime - elapsed) * 1000);
       
       imageTimersRef.current.push(showTimer);
     });
   };
   
+  // Background image job: each image arrives as an SSE event once it is ready
+  const followImageJob = (jobId) => {
+    const startedAt = Date.now();
+    const received = [];
+    const source = new EventSource(`${API_BASE}/images/jobs/${jobId}/events`);
+    imageEventsRef.current = source;
+    
+    source.addEventListener("image", (e) => {
+      received.push(JSON.parse(e.data));
+      received.sort((a, b) => a.step - b.step);
+      console.log(`Received image ${received.length} from background job`);
+      setImages([...received]);
+      // Late images are shown at once, the rest at their start_time
+      startImageSlideshow(received, (Date.now() - startedAt) / 1000);
+    });
+    source.addEventListener("done", () => source.close());
+    source.onerror = () => source.close();
+  };
+  
   useEffect(() => {
     return () => {
       if (slideshowTimerRef.current) {
         clearInterval(slideshowTimerRef.current);
       }
       imageTimersRef.current.forEach(timer => clearTimeout(timer));
+      if (imageEventsRef.current) imageEventsRef.current.close();
     };
   }, []);
 
@@ -0,0 +1,136 @@
+import math
+from typing import Dict, Any, Optional
+
+import numpy as np
+import faiss
+
+INDEX_KINDS = {"flat", "hnsw", "ivf_flat", "ivf_pq"}
+
+
+class IndexSpec:
+    """
+    Describes which FAISS index type backs the vector store.
+
+    Non-flat kinds only take over once the corpus has `min_train_size`
+    vectors; below that an exact flat index is both faster and exact.
+    Written as "kind" or "kind:key=value,...", e.g. "ivf_pq:nlist=256,m=16".
+    """
+
+    DEFAULTS: Dict[str, Any] = {
+        "min_train_size": 2000,
+        # HNSW
+        "hnsw_m": 32,
+        "ef_construction": 80,
+        "ef_search": 64,
+        # IVF (nlist=0 picks ~4*sqrt(n) at training time)
+        "nlist": 0,
+        "nprobe": 8,
+        # PQ
+        "m": 16,
+        "nbits": 8,
+        # IVF indexes are retrained once the corpus grows by this factor
+        "retrain_growth": 4.0,
+    }
+
+    def __init__(self, kind: str = "flat", **params: Any):
+        kind = (kind or "flat").strip().lower()
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind '{kind}'. Choose from {sorted(INDEX_KINDS)}.")
+        unknown = set(params) - set(self.DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown index parameter(s): {sorted(unknown)}")
+        self.kind = kind
+        self.params = {**self.DEFAULTS, **params}
+
+    @classmethod
+    def parse(cls, text: str) -> "IndexSpec":
+        kind, _, rest = (text or "flat").partition(":")
+        params: Dict[str, Any] = {}
+        for item in filter(None, (p.strip() for p in rest.split(","))):
+            key, _, value = item.partition("=")
+            default = cls.DEFAULTS.get(key.strip())
+            params[key.strip()] = type(default)(value) if default is not None else value
+        return cls(kind, **params)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "IndexSpec":
+        if not data:
+            return cls("flat")
+        params = {k: v for k, v in data.get("params", {}).items() if k in cls.DEFAULTS}
+        return cls(data.get("kind", "flat"), **params)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "params": dict(self.params)}
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IndexSpec) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        changed = ",".join(f"{k}={v}" for k, v in self.params.items() if self.DEFAULTS[k] != v)
+        return f"IndexSpec({self.kind}{':' + changed if changed else ''})"
+
+    def wants_rebuild(self, index, trained_on: int) -> bool:
+        """True if `index` should be replaced by one built from this spec."""
+        ntotal = index.ntotal
+        current = index_kind(index)
+        if self.kind == "flat" or ntotal < self.params["min_train_size"]:
+            # Too small for ANN: go back to (or stay on) exact search
+            return current != "flat" and self.kind == "flat"
+        if current != self.kind:
+            return True
+        if current.startswith("ivf") and trained_on and ntotal >= trained_on * self.params["retrain_growth"]:
+            return True
+        return False
+
+
+def index_kind(index) -> str:
+    """Maps a FAISS index instance back to an IndexSpec kind."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def supports_remove(index) -> bool:
+    return not isinstance(index, faiss.IndexHNSW)
+
+
+def build_faiss_index(spec: IndexSpec, vectors: np.ndarray):
+    """Creates, trains and fills a FAISS index (L2 metric, like FAISS.from_texts)."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    p = spec.params
+
+    if spec.kind == "flat" or n < p["min_train_size"]:
+        index = faiss.IndexFlatL2(dim)
+    elif spec.kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, p["hnsw_m"])
+        index.hnsw.efConstruction = p["ef_construction"]
+    else:
+        # Keep at least ~39 training points per centroid, as FAISS recommends
+        nlist = p["nlist"] or int(4 * math.sqrt(n))
+        nlist = max(1, min(nlist, n // 39 or 1))
+        quantizer = faiss.IndexFlatL2(dim)
+        if spec.kind == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            if dim % p["m"] != 0:
+                raise ValueError(f"PQ sub-quantizers m={p['m']} must divide the embedding dimension {dim}")
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, p["m"], p["nbits"])
+        index.train(vectors)
+
+    if n:
+        index.add(vectors)
+    apply_search_params(spec, index)
+    return index
+
+
+def apply_search_params(spec: IndexSpec, index) -> None:
+    """Sets query-time knobs, which are not reliably restored from disk."""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = spec.params["ef_search"]
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(spec.params["nprobe"], index.nlist)
@@ -0,0 +1,166 @@
+import os
+import time
+import atexit
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from index_store import atomic_write_pickle
+
+CACHE_FORMAT_VERSION = 2  # 2: scopes include the question's numbers
+
+
+class SemanticAnswerCache:
+    """
+    Remembers LLM answers by question embedding.
+
+    A lookup returns a stored answer when an earlier question in the same
+    scope (language, subject, retrieved chunk ids, ...) is at least
+    `threshold` cosine-similar to the new one. Entries expire after `ttl`
+    seconds, the least recently used are evicted past `maxsize`, and the
+    cache is pickled to `path` so it survives restarts. Writes are batched:
+    `put` schedules a save `save_delay` seconds later on a background timer
+    (and at interpreter exit) instead of pickling on the request path.
+    """
+
+    def __init__(self, path: str, maxsize: int = 1000, ttl: Optional[float] = 86400.0, threshold: float = 0.92,
+                 save_delay: float = 5.0):
+        self.path = path
+        self.save_delay = save_delay
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.threshold = threshold
+        # entry id -> {"scope", "question", "vector", "answer", "created"}
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+        atexit.register(self.flush)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------------- Persistence ----------------
+    def load(self) -> None:
+        with self._lock:
+            self._entries = OrderedDict()
+            self._next_id = 0
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, "rb") as f:
+                    data = pickle.load(f)
+                if data.get("version") != CACHE_FORMAT_VERSION:
+                    return
+                for entry in data.get("entries", []):
+                    if not self._expired(entry):
+                        self._entries[self._next_id] = entry
+                        self._next_id += 1
+            except Exception as e:
+                print(f"[WARNING] Could not read answer cache, starting fresh: {e}")
+                self._entries = OrderedDict()
+
+    def save(self) -> None:
+        with self._lock:
+            self._dirty = False
+            payload = {"version": CACHE_FORMAT_VERSION, "entries": list(self._entries.values())}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        try:
+            atomic_write_pickle(self.path, payload)
+        except Exception as e:
+            print(f"[WARNING] Could not save answer cache: {e}")
+
+    def _schedule_save(self) -> None:
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self._timed_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _timed_save(self) -> None:
+        with self._lock:
+            self._save_timer = None
+        self.save()
+
+    def flush(self) -> None:
+        """Writes pending changes now (shutdown)."""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+            dirty = self._dirty
+        if timer is not None:
+            timer.cancel()
+        if dirty:
+            self.save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dirty = False
+            self._entries = OrderedDict()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    # ---------------- Lookup ----------------
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl is not None and time.time() - entry["created"] > self.ttl
+
+    def get(self, scope: Hashable, vector) -> Optional[Tuple[str, float]]:
+        """Returns (answer, similarity) of the closest cached question in `scope`, if close enough."""
+        query = _unit(vector)
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id, entry in list(self._entries.items()):
+                if self._expired(entry):
+                    del self._entries[entry_id]
+                    continue
+                if entry["scope"] != scope:
+                    continue
+                score = float(np.dot(entry["vector"], query))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id]["answer"], best_score
+
+    def put(self, scope: Hashable, question: str, vector, answer: str) -> None:
+        with self._lock:
+            self._entries[self._next_id] = {
+                "scope": scope,
+                "question": question,
+                "vector": _unit(vector),
+                "answer": answer,
+                "created": time.time(),
+            }
+            self._next_id += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        self._schedule_save()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
@@ -1,16 +1,25 @@
-from fastapi import FastAPI, UploadFile, HTTPException, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, UploadFile, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-import requests
 from teacher_chatbot_app import TeacherChatbot
+from stage_pool import StageSaturated
+from http_clients import close_async_http_client
+from lecture_proxy import LectureProxy, ProxiedResponse
+from audio_decode import decode_audio_bytes, AudioDecodeError
+from speech_stream import LiveQuestion
 from pathlib import Path
-import uuid
-import shutil
+import json
 import os
 import subprocess
 import sys
-from config import MURF_API_KEY, LECTURE_API_BASE, OUTPUT_DIR, IMAGES_DIR
+import asyncio
+import threading
+from config import (
+    MURF_API_KEY, LECTURE_API_BASE, OUTPUT_DIR, IMAGES_DIR, WARMUP_ON_STARTUP, LECTURE_CACHE_FRESH_SECONDS,
+    LIVE_PARTIAL_EVERY_MS, LIVE_END_SILENCE_MS, LIVE_RESUME_MS, LIVE_PARTIAL_SECONDS,
+)
 
 SUPPORTED_STT_LANGUAGES = {"auto", "en", "ta"}
 
@@ -33,22 +42,81 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # ---------------- CHATBOT INIT ----------------
+# Cheap: models are loaded on first use or by the warmup thread below
 chatbot = TeacherChatbot(
     murf_api_key=MURF_API_KEY
 )
 
+# Pooled, cached async proxy to the Node lecture API
+lecture_proxy = LectureProxy(LECTURE_API_BASE, fresh_for=LECTURE_CACHE_FRESH_SECONDS)
+
+@app.on_event("startup")
+async def start_warmup():
+    """Loads Whisper, the RAG index and the image generator without delaying startup."""
+    if WARMUP_ON_STARTUP:
+        threading.Thread(target=chatbot.warmup, name="warmup", daemon=True).start()
+
+@app.on_event("startup")
+async def remove_stale_uploads():
+    """
+    Deletes `<uuid>.wav` question recordings and `<uuid>.json` segment
+    manifests that older versions saved into OUTPUT_DIR.
+    """
+    removed = 0
+    for pattern in ("*-*-*-*-*.wav", "*-*-*-*-*.json"):
+        for path in OUTPUT_DIR.glob(pattern):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+    if removed:
+        print(f"[Startup] Removed {removed} stale uploads and manifests from {OUTPUT_DIR}")
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await close_async_http_client()
+
 # ---------------- ROOT ----------------
 @app.get("/")
 async def home():
     return {"status": "AI Teaching Assistant API is running"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once every component is loaded, 503 with per-component state before that."""
+    ready = chatbot.is_ready()
+    return JSONResponse(
+        {"ready": ready, "components": chatbot.component_status(), "stages": chatbot.stage_stats()},
+        status_code=200 if ready else 503,
+    )
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit rates and sizes of the TTS, query, retrieval, answer and lecture proxy caches."""
+    return JSONResponse({**chatbot.cache_stats(), "lectures": lecture_proxy.stats()})
+
 # ------------------- Q&A MODE (AUDIO INPUT) -------------------
+async def read_upload_audio(file: UploadFile):
+    """Decodes the uploaded recording in memory to 16 kHz float32 samples (nothing is written to disk)."""
+    data = await file.read()
+    try:
+        return await asyncio.to_thread(decode_audio_bytes, data)
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/ask")
-async def ask(file: UploadFile, language: str = "auto"):
+async def ask(file: UploadFile, language: str = "auto", segmented: bool = False):
     """
     Accepts a WAV file, transcribes the question (Tamil, English or auto-detect),
     generates an AI response, converts to TTS, and returns audio for the avatar.
     Optional query parameter `language` can be `auto`, `en`, or `ta`.
+    With `segmented=true` the answer audio is one file per sentence, listed in
+    `audio_segments` with start times and durations. `timeline` shows when
+    each stage ran and how much overlapping them saved.
+    By default (IMAGES_IN_BACKGROUND) `images` is empty and the images are
+    generated in the background: poll `/images/jobs/{image_job_id}` or
+    subscribe to `/images/jobs/{image_job_id}/events`.
     """
     language_normalized = (language or "").strip().lower()
     if language_normalized not in SUPPORTED_STT_LANGUAGES:
@@ -57,26 +125,171 @@ async def ask(file: UploadFile, language: str = "auto"):
             detail=f"Unsupported language '{language}'. Choose from {sorted(SUPPORTED_STT_LANGUAGES)}."
         )
 
+    audio = await read_upload_audio(file)
     try:
-        input_audio = OUTPUT_DIR / f"{uuid.uuid4()}.wav"
-        with open(input_audio, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-
-        result = chatbot.pipeline(str(input_audio), language_hint=language_normalized)
+        # Runs on the per-stage worker pools; the event loop keeps serving other requests
+        result = await chatbot.pipeline_async(
+            audio, language_hint=language_normalized, segmented=segmented
+        )
 
-        return JSONResponse({
+        response = {
             "mode": "qa",
             "question": result["question"],
             "answer": result["answer"],
             "language": result.get("language", "en"),
-            "audio_url": f"/audio/{Path(result['audio_url']).name}",
+            "audio_url": f"/audio/{Path(result['audio_url']).name}" if result["audio_url"] else None,
             "emotion": result["emotion"],
-            "images": result.get("images", [])  # Include generated images
-        })
+            "images": result.get("images", []),  # Include generated images
+            "timeline": result.get("timeline"),
+        }
+        if segmented:
+            response["audio_segments"] = result["audio_segments"]
+        if "image_job_id" in result:
+            response["image_job_id"] = result["image_job_id"]
+        return JSONResponse(response)
+
+    except StageSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy: {e}",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+# ------------------- Q&A MODE (STREAMING) -------------------
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_stream(file: UploadFile, language: str = "auto"):
+    """
+    Like /ask, but answers as Server-Sent Events so the avatar can start
+    speaking after the first sentence. Events, in order of arrival:
+    `question`, then `token` (LLM text as it streams) interleaved with
+    `sentence` (index, text, audio_url; always in answer order), then
+    `image` per generated image, and finally `done` with the full answer.
+    """
+    language_normalized = (language or "").strip().lower()
+    if language_normalized not in SUPPORTED_STT_LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language '{language}'. Choose from {sorted(SUPPORTED_STT_LANGUAGES)}."
+        )
 
+    audio = await read_upload_audio(file)
+    try:
+        # Transcribe before opening the stream so a full queue can still answer 503
+        question, answer_language = await chatbot.transcribe_async(audio, language_hint=language_normalized)
+    except StageSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy: {e}",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+    async def events():
+        yield sse_event("question", {"question": question, "language": answer_language})
+        try:
+            async for event, data in chatbot.stream_answer(question, answer_language):
+                yield sse_event(event, data)
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ------------------- Q&A MODE (LIVE AUDIO) -------------------
+@app.websocket("/ask/ws")
+async def ask_live(websocket: WebSocket, language: str = "auto", sample_rate: int = 16000):
+    """
+    Live question: send binary frames of 16-bit little-endian mono PCM at
+    `sample_rate` while the child speaks. The server answers with JSON
+    messages: `partial` (transcript so far), then `question` once the child
+    has been silent for a moment, followed by the same `token` / `sentence` /
+    `image` / `done` events as /ask/stream. If the child keeps talking, a
+    `cancelled` message drops the answer in progress and a new `question`
+    follows; `turn` tells the answers apart. Send {"type": "end"} to force
+    the end of a question (e.g. the record button was released).
+    """
+    language_normalized = (language or "").strip().lower()
+    if language_normalized not in SUPPORTED_STT_LANGUAGES or not 8000 <= sample_rate <= 48000:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+
+    session = LiveQuestion(
+        chatbot, websocket.send_json, language_normalized, sample_rate=sample_rate,
+        partial_every_ms=LIVE_PARTIAL_EVERY_MS, end_silence_ms=LIVE_END_SILENCE_MS,
+        resume_ms=LIVE_RESUME_MS, partial_seconds=LIVE_PARTIAL_SECONDS,
+    )
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                await session.feed(message["bytes"])
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    continue
+                if control.get("type") == "end":
+                    await session.end_of_speech()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        try:
+            await session.send({"type": "error", "detail": str(e)})
+        except Exception:
+            pass
+    finally:
+        await session.close()
+
+# ------------------- BACKGROUND IMAGES -------------------
+def get_image_job(job_id: str):
+    job = chatbot.image_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Image job not found")
+    return job
+
+@app.get("/images/jobs/{job_id}")
+async def image_job_status(job_id: str, since: int = 0):
+    """Poll a background image job. `since` skips images the client already has."""
+    return JSONResponse(get_image_job(job_id).to_dict(since=since))
+
+@app.get("/images/jobs/{job_id}/events")
+async def image_job_events(job_id: str):
+    """Server-Sent Events: one `image` event per image as it finishes, then `done`."""
+    job = get_image_job(job_id)
+
+    async def events():
+        seen = 0
+        while True:
+            await chatbot.image_jobs.wait_for_change(job, seen, 5.0)
+            new_images = job.images[seen:]
+            for image in new_images:
+                yield sse_event("image", image)
+            seen += len(new_images)
+            if job.finished and seen >= len(job.images):
+                yield sse_event("done", job.to_dict(since=seen))
+                return
+            if not new_images:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ------------------- SERVE AUDIO FILES -------------------
 @app.get("/audio/{filename}")
 async def get_audio(filename: str):
@@ -90,21 +303,31 @@ async def get_audio(filename: str):
 # Proxies to the Node.js routes.ts API
 # ================================================================
 
+def proxied(result: ProxiedResponse, request: Request) -> Response:
+    """Returns a buffered upstream response, or 304 if the client's ETag still matches."""
+    headers = {"ETag": result.etag}
+    if result.status_code == 200 and request.headers.get("if-none-match") == result.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=result.body,
+        status_code=result.status_code,
+        media_type=result.content_type,
+        headers=headers,
+    )
+
 @app.get("/lectures")
-async def list_lectures():
+async def list_lectures(request: Request):
     """Get all lectures."""
     try:
-        r = requests.get(f"{LECTURE_API_BASE}/lectures", timeout=20)
-        return JSONResponse(r.json())
+        return proxied(await lecture_proxy.get("/lectures", timeout=20), request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching lectures: {e}")
 
 @app.get("/lectures/{lecture_id}")
-async def get_lecture(lecture_id: str):
+async def get_lecture(lecture_id: str, request: Request):
     """Get details of one lecture."""
     try:
-        r = requests.get(f"{LECTURE_API_BASE}/lectures/{lecture_id}", timeout=20)
-        return JSONResponse(r.json())
+        return proxied(await lecture_proxy.get(f"/lectures/{lecture_id}", timeout=20), request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching lecture: {e}")
 
@@ -113,22 +336,31 @@ async def create_lecture(request: Request):
     """
     Create a new lecture (teacher uploads text content).
     This automatically triggers summarization and quiz generation
-    through the Node.js lecture API.
+    through the Node.js lecture API. The upstream response is streamed through.
     """
     try:
         payload = await request.json()
-        r = requests.post(f"{LECTURE_API_BASE}/lectures", json=payload, timeout=60)
-        return JSONResponse(r.json())
+        upstream = await lecture_proxy.open_stream("POST", "/lectures", json=payload, timeout=60)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating lecture: {e}")
+    # The lecture list is stale now
+    lecture_proxy.invalidate("/lectures")
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        media_type=upstream.headers.get("content-type", "application/json"),
+        background=BackgroundTask(upstream.aclose),
+    )
 
 @app.post("/quizzes/generate")
 async def generate_quiz(request: Request):
-    """Generate quiz questions for a lecture."""
+    """
+    Generate quiz questions for a lecture. Identical requests that arrive
+    while one is already running share its upstream call and result.
+    """
     try:
         payload = await request.json()
-        r = requests.post(f"{LECTURE_API_BASE}/quizzes/generate", json=payload, timeout=60)
-        return JSONResponse(r.json())
+        return proxied(await lecture_proxy.post_coalesced("/quizzes/generate", payload, timeout=60), request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {e}")
 
@@ -145,7 +377,7 @@ async def speak(request: Request):
         if not text:
             raise HTTPException(status_code=400, detail="Missing 'text' field")
 
-        tts_file = chatbot.tts(text)
+        tts_file = await chatbot.stages["tts"].run_async(chatbot.tts, text, wait=False)
 
         return JSONResponse({
             "mode": "speak",
@@ -154,9 +386,57 @@ async def speak(request: Request):
             "emotion": "neutral"
         })
 
+    except HTTPException:
+        raise
+    except StageSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy: {e}",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"TTS error: {e}")
 
+@app.post("/speak/segments")
+async def speak_segments(request: Request):
+    """
+    Segmented TTS: synthesizes the text sentence by sentence (a few at a time).
+    Returns the manifest (ordered segments with audio_url, start_time and
+    duration). With `"stream": true` in the body, segments are sent as
+    NDJSON lines in order as soon as each is ready, then a final "done" line.
+    """
+    data = await request.json()
+    text = data.get("text")
+    if not text:
+        raise HTTPException(status_code=400, detail="Missing 'text' field")
+    target_language = data.get("language", "en")
+
+    if not data.get("stream"):
+        try:
+            manifest = await chatbot.tts_segments(text, target_language=target_language, wait=False)
+            return JSONResponse({"mode": "speak", "text": text, **manifest})
+        except StageSaturated as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server busy: {e}",
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"TTS error: {e}")
+
+    async def lines():
+        segments = []
+        try:
+            async for segment in chatbot.iter_tts_segments(text, target_language=target_language):
+                segments.append(segment)
+                yield json.dumps({"event": "segment", **segment}, ensure_ascii=False) + "\n"
+            total = round(sum(s["duration"] or 0.0 for s in segments), 3)
+            yield json.dumps({"event": "done", "segments": len(segments), "total_duration": total}) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # ------------------- GAMES LAUNCHER -------------------
 @app.post("/launch-games")
 async def launch_games():
@@ -0,0 +1,79 @@
+"""
+Decodes uploaded audio straight from memory into the 16 kHz mono float32
+samples Whisper works on, so /ask never writes the upload to disk.
+
+PCM WAV (what the frontend records) is parsed with the standard library
+and NumPy; anything else goes through faster-whisper's PyAV decoder on an
+in-memory buffer.
+"""
+import io
+import wave
+from math import gcd
+
+import numpy as np
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(ValueError):
+    """The upload is empty or not audio we can decode."""
+
+
+def decode_audio_bytes(data: bytes, sampling_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """Returns mono float32 samples in [-1, 1] at `sampling_rate`."""
+    if not data:
+        raise AudioDecodeError("Empty audio upload")
+    try:
+        samples, rate = _decode_wav(data)
+    except (wave.Error, EOFError, ValueError):
+        return _decode_with_av(data, sampling_rate)
+    return resample(samples, rate, sampling_rate)
+
+
+def _decode_wav(data: bytes):
+    with wave.open(io.BytesIO(data), "rb") as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        frames = w.readframes(w.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        # Left-align the 24-bit samples in int32 so the sign bit lands in place
+        widened = np.zeros((raw.shape[0], 4), dtype=np.uint8)
+        widened[:, 1:] = raw
+        samples = widened.view("<i4").ravel().astype(np.float32) / 2147483648.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples.astype(np.float32, copy=False), rate
+
+
+def _decode_with_av(data: bytes, sampling_rate: int) -> np.ndarray:
+    try:
+        from faster_whisper import decode_audio
+        return decode_audio(io.BytesIO(data), sampling_rate=sampling_rate)
+    except ImportError:
+        raise AudioDecodeError("Only PCM WAV uploads are supported without faster-whisper installed")
+    except Exception as e:
+        raise AudioDecodeError(f"Could not decode audio: {e}") from e
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """Polyphase resampling when SciPy is available, linear interpolation otherwise."""
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    try:
+        from scipy.signal import resample_poly
+        divisor = gcd(rate, target_rate)
+        return resample_poly(samples, target_rate // divisor, rate // divisor).astype(np.float32)
+    except ImportError:
+        length = int(round(len(samples) * target_rate / rate))
+        positions = np.arange(length) * (rate / target_rate)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
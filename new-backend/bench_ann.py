@@ -0,0 +1,115 @@
+"""
+Benchmark: recall@k and query latency of ANN index types vs. the flat baseline,
+using chunks from the bundled docs/ corpus.
+
+Usage:
+    python bench_ann.py [--docs ./docs] [--k 5] [--queries 200]
+                        [--specs "hnsw" "ivf_flat" "ivf_pq:m=16"]
+
+Chunk embeddings go through the same on-disk embedding cache as RAGSystem,
+so repeated runs only pay for encoding once.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from ann_index import IndexSpec, build_faiss_index
+from document_loader import SUPPORTED_EXTENSIONS, iter_extracted_documents
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from rag_system import EMBEDDING_MODEL_NAME, smart_chunk_documents
+from config import EMBEDDING_BATCH_SIZE, EMBEDDING_CACHE_DTYPE
+
+
+def load_chunks(docs_folder):
+    paths = [
+        os.path.join(docs_folder, name)
+        for name in sorted(os.listdir(docs_folder))
+        if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+    ]
+    raw_docs = []
+    for _, docs in iter_extracted_documents(paths):
+        raw_docs.extend(docs)
+    return smart_chunk_documents(raw_docs)
+
+
+def make_queries(chunks, count, seed=0):
+    """Short keyword-style queries cut from random chunks, like a child's question."""
+    rng = random.Random(seed)
+    queries = []
+    for chunk in rng.sample(chunks, min(count, len(chunks))):
+        words = chunk.page_content.split()
+        start = rng.randrange(max(1, len(words) - 8))
+        queries.append(" ".join(words[start:start + 8]))
+    return queries
+
+
+def timed_search(index, queries, k):
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = index.search(q.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(ids[0])
+    return np.array(results), np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "docs"))
+    parser.add_argument("--cache", default="./indexes/embedding_cache")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--specs", nargs="+", default=["hnsw", "ivf_flat", "ivf_pq:m=16"])
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Loading and chunking corpus...")
+    chunks = load_chunks(args.docs)
+    if not chunks:
+        print(f"❌ No chunks produced from {args.docs}")
+        sys.exit(1)
+
+    embeddings = CachedEmbeddings(
+        HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"normalize_embeddings": True, "batch_size": EMBEDDING_BATCH_SIZE},
+        ),
+        EmbeddingCache(args.cache, EMBEDDING_MODEL_NAME, normalize=True, dtype=EMBEDDING_CACHE_DTYPE),
+        batch_size=EMBEDDING_BATCH_SIZE,
+    )
+    vectors = np.asarray(embeddings.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+    queries = np.asarray(
+        [embeddings.embed_query(q) for q in make_queries(chunks, args.queries)], dtype=np.float32
+    )
+    print(f"Corpus: {len(chunks)} chunks x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+    print("=" * 60)
+
+    baseline = build_faiss_index(IndexSpec("flat"), vectors)
+    truth, flat_lat = timed_search(baseline, queries, args.k)
+
+    print(f"{'index':<28}{'build s':>9}{'recall@k':>10}{'p50 ms':>9}{'p95 ms':>9}")
+    print(f"{'flat (exact)':<28}{0.0:>9.2f}{1.0:>10.3f}"
+          f"{np.percentile(flat_lat, 50):>9.3f}{np.percentile(flat_lat, 95):>9.3f}")
+
+    for text in args.specs:
+        # Force the ANN type even though the bundled corpus is small
+        spec = IndexSpec.parse(text)
+        spec.params["min_train_size"] = 0
+        start = time.perf_counter()
+        index = build_faiss_index(spec, vectors)
+        build_time = time.perf_counter() - start
+
+        found, lat = timed_search(index, queries, args.k)
+        recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+        print(f"{repr(spec):<28}{build_time:>9.2f}{recall:>10.3f}"
+              f"{np.percentile(lat, 50):>9.3f}{np.percentile(lat, 95):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Load test for /ask: fires concurrent requests at a running server and, at
+the same time, probes GET / to check the event loop stays responsive.
+
+Usage:
+    uvicorn app:app --port 8000          # in another terminal
+    python bench_ask_load.py [--url http://127.0.0.1:8000] [--wav question.wav]
+                             [--concurrency 8] [--requests 16]
+
+Without --wav a short generated tone is sent (Whisper will not understand
+it, but every pipeline stage still runs). If requests no longer serialize,
+wall time is well below the sum of request latencies and the / probe stays
+in the milliseconds.
+"""
+import io
+import math
+import time
+import wave
+import struct
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+
+def make_tone_wav(seconds=2.0, rate=16000):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        frames = (int(8000 * math.sin(2 * math.pi * 440 * i / rate)) for i in range(int(seconds * rate)))
+        w.writeframes(b"".join(struct.pack("<h", f) for f in frames))
+    return buf.getvalue()
+
+
+def ask(url, audio):
+    start = time.perf_counter()
+    try:
+        r = requests.post(f"{url}/ask", files={"file": ("question.wav", audio, "audio/wav")}, timeout=600)
+        return r.status_code, time.perf_counter() - start, r.headers.get("Retry-After")
+    except requests.RequestException as e:
+        return type(e).__name__, time.perf_counter() - start, None
+
+
+def probe(url, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            requests.get(f"{url}/", timeout=30)
+            latencies.append((time.perf_counter() - start) * 1000)
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--wav", help="WAV file with a spoken question")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=16)
+    args = parser.parse_args()
+
+    audio = open(args.wav, "rb").read() if args.wav else make_tone_wav()
+
+    print("=" * 60)
+    print(f"POST /ask x{args.requests}, {args.concurrency} at a time -> {args.url}")
+    print("=" * 60)
+
+    stop, probe_latencies = threading.Event(), []
+    prober = threading.Thread(target=probe, args=(args.url, stop, probe_latencies), daemon=True)
+    prober.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: ask(args.url, audio), range(args.requests)))
+    wall = time.perf_counter() - start
+    stop.set()
+    prober.join()
+
+    statuses = Counter(status for status, _, _ in results)
+    ok = [latency for status, latency, _ in results if status == 200]
+    retry_after = [int(ra) for status, _, ra in results if status == 503 and ra]
+
+    print(f"Status codes:           {dict(statuses)}")
+    print(f"Wall time:              {wall:.2f}s")
+    if ok:
+        print(f"Sum of 200 latencies:   {sum(ok):.2f}s  (overlap factor {sum(ok) / wall:.2f}x)")
+        print(f"/ask latency p50/p95:   {np.percentile(ok, 50):.2f}s / {np.percentile(ok, 95):.2f}s")
+    if retry_after:
+        print(f"503 Retry-After:        {min(retry_after)}-{max(retry_after)}s")
+    if probe_latencies:
+        print(f"GET / during load:      p50 {np.percentile(probe_latencies, 50):.1f} ms, "
+              f"p95 {np.percentile(probe_latencies, 95):.1f} ms, max {max(probe_latencies):.1f} ms "
+              f"({len(probe_latencies)} probes)")
+
+    try:
+        stages = requests.get(f"{args.url}/ready", timeout=10).json().get("stages", {})
+        for name, stats in stages.items():
+            print(f"  {name:<8}{stats}")
+    except (requests.RequestException, ValueError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: serial vs. parallel document extraction on the bundled docs/ corpus.
+
+Usage:
+    python bench_extraction.py [--docs ./docs] [--workers N] [--pages-per-task 16]
+"""
+import os
+import sys
+import time
+import argparse
+
+from document_loader import (
+    SUPPORTED_EXTENSIONS,
+    DEFAULT_PAGES_PER_TASK,
+    load_document_from_path,
+    iter_extracted_documents,
+)
+
+
+def list_corpus(docs_folder):
+    return [
+        os.path.join(docs_folder, name)
+        for name in sorted(os.listdir(docs_folder))
+        if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+    ]
+
+
+def run_serial(paths):
+    return [(path, load_document_from_path(path)) for path in paths]
+
+
+def run_parallel(paths, workers, pages_per_task):
+    return list(iter_extracted_documents(paths, max_workers=workers, pages_per_task=pages_per_task))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "docs"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pages-per-task", type=int, default=DEFAULT_PAGES_PER_TASK)
+    args = parser.parse_args()
+
+    paths = list_corpus(args.docs)
+    if not paths:
+        print(f"❌ No supported documents found in {args.docs}")
+        sys.exit(1)
+
+    total_mb = sum(os.path.getsize(p) for p in paths) / (1024 * 1024)
+    print("=" * 60)
+    print(f"Corpus: {len(paths)} files, {total_mb:.1f} MB ({args.docs})")
+    print(f"Workers: {args.workers}, pages per task: {args.pages_per_task}")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    serial = run_serial(paths)
+    serial_time = time.perf_counter() - start
+    print(f"Serial extraction:   {serial_time:7.2f}s")
+
+    start = time.perf_counter()
+    parallel = run_parallel(paths, args.workers, args.pages_per_task)
+    parallel_time = time.perf_counter() - start
+    print(f"Parallel extraction: {parallel_time:7.2f}s")
+
+    # The parallel path must produce exactly the same documents, in order
+    mismatches = [
+        os.path.basename(s_path)
+        for (s_path, s_docs), (p_path, p_docs) in zip(serial, parallel)
+        if s_path != p_path or s_docs != p_docs
+    ]
+    if len(serial) != len(parallel):
+        mismatches.append(f"document count {len(serial)} != {len(parallel)}")
+
+    print("-" * 60)
+    print(f"Speedup: {serial_time / parallel_time:.2f}x")
+    if mismatches:
+        print(f"❌ Output differs for: {', '.join(mismatches)}")
+        sys.exit(1)
+    print("✅ Parallel output identical to serial output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Startup report: import time of the backend modules, and how long a fresh
+server takes to answer its first request and to become ready (all models warm).
+
+Usage:
+    python bench_startup.py [--port 8765] [--timeout 600] [--top 15]
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULES = ["config", "text_utils", "teacher_chatbot_app", "app", "rag_system", "teacher_chatbot"]
+
+
+def import_time(module):
+    """Wall-clock seconds to import `module` in a new interpreter, or None if it fails."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1:] or ["unknown error"]
+    return float(result.stdout.strip().splitlines()[-1]), None
+
+
+def heaviest_imports(module, top):
+    """Parses `python -X importtime` output into the `top` slowest packages (cumulative)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        # Nested imports are indented; top-level entries already include them
+        if not name[1:].startswith(" "):
+            rows.append((int(cumulative_us) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def time_to_first_request(port, timeout):
+    """Starts uvicorn and times the first 200 from / and from /ready."""
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    first_request = ready = None
+    try:
+        while time.perf_counter() - start < timeout and server.poll() is None:
+            try:
+                if first_request is None:
+                    if requests.get(f"http://127.0.0.1:{port}/", timeout=2).status_code == 200:
+                        first_request = time.perf_counter() - start
+                r = requests.get(f"http://127.0.0.1:{port}/ready", timeout=2)
+                if r.status_code == 200:
+                    ready = time.perf_counter() - start
+                    return first_request, ready, r.json()["components"]
+            except requests.RequestException:
+                pass
+            time.sleep(0.1)
+        return first_request, ready, None
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--skip-server", action="store_true", help="Only measure import times")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Import time (fresh interpreter)")
+    print("=" * 60)
+    for module in MODULES:
+        seconds, error = import_time(module)
+        if seconds is None:
+            print(f"{module:<24}{'failed':>10}  {error[0]}")
+        else:
+            print(f"{module:<24}{seconds:>9.2f}s")
+
+    print("\n" + "=" * 60)
+    print(f"Slowest imports under 'app' (cumulative)")
+    print("=" * 60)
+    for seconds, name in heaviest_imports("app", args.top):
+        print(f"{name:<40}{seconds:>9.3f}s")
+
+    if args.skip_server:
+        return
+
+    print("\n" + "=" * 60)
+    print("Server startup")
+    print("=" * 60)
+    first_request, ready, components = time_to_first_request(args.port, args.timeout)
+    print(f"Time to first request:   {first_request:.2f}s" if first_request else "Time to first request:   not reached")
+    print(f"Time to ready (/ready):  {ready:.2f}s" if ready else f"Time to ready (/ready):  not reached in {args.timeout:.0f}s")
+    for name, status in (components or {}).items():
+        print(f"  {name:<20}{status.get('state'):<10}{status.get('load_seconds', '')}")
+
+
+if __name__ == "__main__":
+    main()
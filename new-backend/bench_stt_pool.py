@@ -0,0 +1,79 @@
+"""
+STT concurrency benchmark: transcribes the same clip many times at once
+through WhisperPool with 1, 2, 4, ... model instances (cores split evenly
+between them) and reports throughput, queue wait and decode time.
+
+Usage:
+    python bench_stt_pool.py [--wav question.wav] [--model small]
+                             [--instances 1 2 4] [--requests 16]
+
+Without --wav a short generated tone is transcribed. Throughput should
+grow with the instance count until the cores are used up; average queue
+wait should fall accordingly.
+"""
+import os
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_ask_load import make_tone_wav
+from stt_pool import WhisperPool, default_cpu_threads
+
+
+def run(pool, audio_path, requests):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=requests) as executor:
+        # All requests arrive at once, like a classroom asking together
+        timings = list(executor.map(lambda _: pool.transcribe(audio_path, task="transcribe")[2], range(requests)))
+    wall = time.perf_counter() - start
+    waits = sorted(t["wait_seconds"] for t in timings)
+    decodes = sorted(t["decode_seconds"] for t in timings)
+    return {
+        "wall": wall,
+        "throughput": requests / wall,
+        "avg_wait": sum(waits) / len(waits),
+        "max_wait": waits[-1],
+        "avg_decode": sum(decodes) / len(decodes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wav", help="WAV file with a spoken question")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--instances", type=int, nargs="+")
+    parser.add_argument("--requests", type=int, default=16)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    instances = args.instances or [n for n in (1, 2, 4, 8) if n <= cores]
+
+    audio_path = args.wav
+    if not audio_path:
+        fd, audio_path = tempfile.mkstemp(suffix=".wav")
+        with os.fdopen(fd, "wb") as f:
+            f.write(make_tone_wav())
+
+    print("=" * 60)
+    print(f"Whisper '{args.model}', {args.requests} concurrent transcriptions, {cores} cores")
+    print("=" * 60)
+    print(f"{'instances':>9} {'threads':>7} {'wall s':>8} {'req/s':>7} {'avg wait':>9} {'max wait':>9} {'decode':>7}")
+
+    baseline = None
+    for n in instances:
+        pool = WhisperPool(args.model, instances=n, cpu_threads=default_cpu_threads(n))
+        pool.transcribe(audio_path, task="transcribe")  # first decode pays one-off setup
+        r = run(pool, audio_path, args.requests)
+        baseline = baseline or r["throughput"]
+        print(f"{n:>9} {pool.cpu_threads:>7} {r['wall']:>8.2f} {r['throughput']:>7.2f} "
+              f"{r['avg_wait']:>9.2f} {r['max_wait']:>9.2f} {r['avg_decode']:>7.2f}"
+              f"   x{r['throughput'] / baseline:.2f}")
+        del pool
+
+    if not args.wav:
+        os.remove(audio_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+VAD pre-pass benchmark: transcribes each recorded clip once as is and once
+after vad.prepare_speech, and compares decode time and transcripts.
+
+Usage:
+    python bench_vad.py samples/*.wav [--model small] [--language en]
+                        [--margin-db 12] [--max-noise-db -50] [--pad-ms 200]
+                        [--max-pause-ms 500]
+
+Use real recordings from the frontend (leading/trailing silence and pauses
+are what the pre-pass removes). Each clip is decoded once first so model
+warm-up doesn't count against the full-clip run.
+"""
+import time
+import argparse
+
+from audio_decode import decode_audio_bytes, WHISPER_SAMPLE_RATE
+from vad import prepare_speech
+
+
+def transcribe(model, chunks, language):
+    start = time.perf_counter()
+    texts = []
+    for chunk in chunks:
+        segments, info = model.transcribe(chunk, language=language, task="transcribe")
+        texts.extend(seg.text for seg in segments)
+        language = language or info.language
+    return " ".join(texts).strip(), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("clips", nargs="+", help="WAV (or other audio) files")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--margin-db", type=float, default=12.0)
+    parser.add_argument("--max-noise-db", type=float, default=-50.0)
+    parser.add_argument("--pad-ms", type=int, default=200)
+    parser.add_argument("--max-pause-ms", type=int, default=500)
+    args = parser.parse_args()
+
+    from faster_whisper import WhisperModel
+    model = WhisperModel(args.model, device="cpu", compute_type="int8")
+
+    print("=" * 60)
+    print(f"Whisper '{args.model}' on {len(args.clips)} clip(s), full clip vs VAD pre-pass")
+    print("=" * 60)
+
+    totals = {"audio": 0.0, "kept": 0.0, "full": 0.0, "vad": 0.0}
+    changed = 0
+    for path in args.clips:
+        with open(path, "rb") as f:
+            samples = decode_audio_bytes(f.read())
+        chunks = prepare_speech(samples, margin_db=args.margin_db, max_noise_db=args.max_noise_db,
+                                pad_ms=args.pad_ms, max_pause_ms=args.max_pause_ms)
+        transcribe(model, [samples[:WHISPER_SAMPLE_RATE]], args.language)  # warm-up
+
+        full_text, full_seconds = transcribe(model, [samples], args.language)
+        vad_text, vad_seconds = transcribe(model, chunks, args.language)
+        audio_seconds = len(samples) / WHISPER_SAMPLE_RATE
+        kept_seconds = sum(len(c) for c in chunks) / WHISPER_SAMPLE_RATE
+
+        same = full_text.lower() == vad_text.lower()
+        changed += not same
+        totals["audio"] += audio_seconds
+        totals["kept"] += kept_seconds
+        totals["full"] += full_seconds
+        totals["vad"] += vad_seconds
+        print(f"\n{path}: audio {audio_seconds:.1f}s -> {kept_seconds:.1f}s in {len(chunks)} chunk(s)")
+        print(f"  decode {full_seconds:.2f}s -> {vad_seconds:.2f}s   transcript {'same' if same else 'CHANGED'}")
+        if not same:
+            print(f"    full: {full_text}")
+            print(f"    vad:  {vad_text}")
+
+    print("\n" + "=" * 60)
+    print(f"Audio decoded: {totals['audio']:.1f}s -> {totals['kept']:.1f}s")
+    print(f"Decode time:   {totals['full']:.2f}s -> {totals['vad']:.2f}s "
+          f"({100 * (1 - totals['vad'] / max(totals['full'], 1e-9)):.0f}% saved)")
+    print(f"Transcripts changed: {changed}/{len(args.clips)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import os
+import re
+import gzip
+import json
+import math
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+
+from langchain_core.documents import Document
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring over the same chunks as the
+    vector store. Needs no embeddings model, so it keeps document retrieval
+    working in offline mode. Persisted as gzipped JSON.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.docs: Dict[str, Dict[str, Any]] = {}          # chunk id -> {"text", "metadata", "length"}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # term -> {chunk id: term frequency}
+        self.total_length = 0
+        self.subject_counts: Counter = Counter()
+        self.dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    # ---------------- Persistence ----------------
+    def load(self) -> None:
+        self.clear()
+        self.dirty = False
+        if not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            for chunk_id, doc in data.get("docs", {}).items():
+                self._add_locked(chunk_id, doc["text"], doc["metadata"])
+            self.dirty = False
+        except Exception as e:
+            print(f"[WARNING] Could not read BM25 index, starting fresh: {e}")
+            self.clear()
+
+    def save(self) -> None:
+        """Writes the index atomically (temp file + rename) if it changed."""
+        with self._lock:
+            if not self.dirty:
+                return
+            # Postings are rebuilt on load, so only the chunks are stored
+            payload = {"docs": {cid: {"text": d["text"], "metadata": d["metadata"]} for cid, d in self.docs.items()}}
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json.gz")
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                    json.dump(payload, f)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self.dirty = False
+
+    def clear(self) -> None:
+        self.docs = {}
+        self.postings = defaultdict(dict)
+        self.total_length = 0
+        self.subject_counts = Counter()
+        self.dirty = True
+
+    # ---------------- Mutations ----------------
+    def add_documents(self, documents: List[Document], ids: List[str]) -> None:
+        with self._lock:
+            for chunk_id, doc in zip(ids, documents):
+                self._remove_locked(chunk_id)
+                self._add_locked(chunk_id, doc.page_content, dict(doc.metadata))
+            self.dirty = True
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            for chunk_id in ids:
+                self._remove_locked(chunk_id)
+            self.dirty = True
+
+    def _add_locked(self, chunk_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        terms = Counter(tokenize(text))
+        length = sum(terms.values())
+        self.docs[chunk_id] = {"text": text, "metadata": metadata, "length": length}
+        self.total_length += length
+        self.subject_counts[metadata.get("subject")] += 1
+        for term, tf in terms.items():
+            self.postings[term][chunk_id] = tf
+
+    def _remove_locked(self, chunk_id: str) -> None:
+        doc = self.docs.pop(chunk_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc["length"]
+        self.subject_counts[doc["metadata"].get("subject")] -= 1
+        for term in set(tokenize(doc["text"])):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(chunk_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    # ---------------- Search ----------------
+    def has_subject(self, subject: str) -> bool:
+        return self.subject_counts.get(subject, 0) > 0
+
+    def search(self, query: str, k: int = 5, subject: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Returns up to k (Document, score) pairs, best first."""
+        with self._lock:
+            n = len(self.docs)
+            if n == 0:
+                return []
+            avgdl = self.total_length / n
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for chunk_id, tf in posting.items():
+                    doc = self.docs[chunk_id]
+                    if subject and doc["metadata"].get("subject") != subject:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * doc["length"] / avgdl)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [
+                (Document(id=chunk_id, page_content=self.docs[chunk_id]["text"],
+                          metadata=dict(self.docs[chunk_id]["metadata"])), score)
+                for chunk_id, score in best
+            ]
@@ -24,3 +24,103 @@ HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY", "")  # For FLUX Schnell i
 
 # Directory for generated images
 IMAGES_DIR = Path("static/generated_images")
+
+# Embedding cache for RAG ingestion (chunks are only re-encoded on a cache miss)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")  # or "float16" to halve disk use
+
+# FAISS persistence: "incremental" appends a segment per ingest and compacts in
+# the background; "full" rewrites the whole index on every ingest
+INDEX_PERSISTENCE = os.getenv("INDEX_PERSISTENCE", "incremental")
+INDEX_COMPACT_AFTER_SEGMENTS = int(os.getenv("INDEX_COMPACT_AFTER_SEGMENTS", "8"))
+
+# ANN index type for the RAG vector store: "flat", "hnsw", "ivf_flat" or "ivf_pq",
+# optionally with params, e.g. "ivf_pq:nlist=256,m=16,nprobe=16,min_train_size=5000".
+# Empty keeps the type the saved index was built with (flat for a new index).
+INDEX_SPEC = os.getenv("INDEX_SPEC", "")
+
+# Default retrieval for RAG context: "vector", "bm25" or "hybrid" (reciprocal-rank fusion)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
+# RAG query caches (query -> embedding, query -> retrieved chunk ids)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))  # seconds
+
+# Semantic answer cache in front of the LLM (similar question + same scope -> stored answer)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))  # cosine similarity
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))  # seconds
+
+# Startup: heavy models load lazily; with warmup on they are loaded in a
+# background thread as soon as the server starts
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+STT_MODEL_SIZE = os.getenv("STT_MODEL_SIZE", "small")
+
+# /ask pipeline concurrency: workers per stage, and how many more requests may
+# wait per stage before /ask answers 503 with Retry-After
+STT_WORKERS = int(os.getenv("STT_WORKERS", "1"))
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "4"))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+STAGE_MAX_QUEUE = int(os.getenv("STAGE_MAX_QUEUE", "8"))
+# One Whisper model per STT worker; each gets this many cores (0 = split all cores evenly)
+STT_CPU_THREADS = int(os.getenv("STT_CPU_THREADS", "0"))
+
+# Segmented TTS: answers are synthesized sentence by sentence, this many at once
+TTS_SEGMENT_PARALLELISM = int(os.getenv("TTS_SEGMENT_PARALLELISM", "3"))
+TTS_SEGMENT_MIN_CHARS = int(os.getenv("TTS_SEGMENT_MIN_CHARS", "20"))  # shorter sentences are merged
+
+# Cache of synthesized speech (same text + voice -> same file), LRU-evicted past this size
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "500"))
+TTS_CACHE_GRACE_SECONDS = float(os.getenv("TTS_CACHE_GRACE_SECONDS", "600"))  # just-returned files are not evicted
+TTS_CACHE_INDEX = Path(os.getenv("TTS_CACHE_INDEX", "indexes/tts_cache.json"))  # outside OUTPUT_DIR, not served
+
+# Shared outbound HTTP clients (Murf, Pollinations, lecture API)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "20"))  # seconds, when a call sets none
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))  # keep-alive connections per host
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))  # seconds, doubled per retry
+MURF_TIMEOUT = float(os.getenv("MURF_TIMEOUT", "60"))  # seconds; a long answer synthesized in one call takes a while
+
+# Lecture API proxy: cached GETs are reused this long before being revalidated upstream
+LECTURE_CACHE_FRESH_SECONDS = float(os.getenv("LECTURE_CACHE_FRESH_SECONDS", "5"))
+
+# /ask returns as soon as the audio is ready and generates images as a background
+# job; the Q&A frontend follows the returned image_job_id. Set to false for clients
+# that expect the images inline in the /ask response
+IMAGES_IN_BACKGROUND = os.getenv("IMAGES_IN_BACKGROUND", "true").lower() == "true"
+IMAGE_JOB_TTL = float(os.getenv("IMAGE_JOB_TTL", "600"))  # seconds a finished job stays pollable
+
+# Image fetches for one answer run concurrently; whatever isn't done by the deadline is dropped
+IMAGE_DEADLINE_SECONDS = float(os.getenv("IMAGE_DEADLINE_SECONDS", "30"))
+IMAGE_FETCH_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "4"))
+
+# Generated images are cached by prompt (LRU-evicted past this size); identical files are stored
+# once. With a distance >= 0, near-identical images (perceptual hash within this many bits) of
+# prompts with the same numbers, colours and objects are stored once too; -1 (default) turns that off
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "200"))
+IMAGE_DEDUP_MAX_DISTANCE = int(os.getenv("IMAGE_DEDUP_MAX_DISTANCE", "-1"))
+IMAGE_CACHE_INDEX = Path(os.getenv("IMAGE_CACHE_INDEX", "indexes/image_cache.json"))  # outside /static, not served
+IMAGE_CACHE_GRACE_SECONDS = float(os.getenv("IMAGE_CACHE_GRACE_SECONDS", "600"))  # just-returned images are not evicted
+
+# Image prompt planning: plans are remembered per answer text; answers up to this many words
+# are planned locally from the numbers and objects they mention (0 = always ask the LLM).
+# Non-English answers, or ones with nothing countable to draw, still go to the cache and LLM
+IMAGE_PLAN_CACHE_SIZE = int(os.getenv("IMAGE_PLAN_CACHE_SIZE", "2000"))
+IMAGE_PLAN_CACHE_TTL = float(os.getenv("IMAGE_PLAN_CACHE_TTL", "604800"))  # seconds
+IMAGE_PLAN_CACHE_PATH = Path(os.getenv("IMAGE_PLAN_CACHE_PATH", "indexes/image_plans.json"))  # outside /static
+IMAGE_PLAN_LOCAL_MAX_WORDS = int(os.getenv("IMAGE_PLAN_LOCAL_MAX_WORDS", "25"))
+
+# STT pre-pass: drop silence before/after speech and shorten long pauses before Whisper decodes
+STT_VAD_ENABLED = os.getenv("STT_VAD_ENABLED", "true").lower() == "true"
+STT_VAD_MARGIN_DB = float(os.getenv("STT_VAD_MARGIN_DB", "12"))  # above the clip's noise floor
+STT_VAD_MAX_NOISE_DB = float(os.getenv("STT_VAD_MAX_NOISE_DB", "-50"))  # louder floor: clip is not trimmed
+STT_VAD_PAD_MS = int(os.getenv("STT_VAD_PAD_MS", "200"))  # context kept around each speech region
+STT_VAD_MAX_PAUSE_MS = int(os.getenv("STT_VAD_MAX_PAUSE_MS", "500"))
+
+# Live questions over /ask/ws: partial transcript interval, and the silence that ends a question
+LIVE_PARTIAL_EVERY_MS = int(os.getenv("LIVE_PARTIAL_EVERY_MS", "1000"))
+LIVE_END_SILENCE_MS = int(os.getenv("LIVE_END_SILENCE_MS", "700"))
+LIVE_RESUME_MS = int(os.getenv("LIVE_RESUME_MS", "300"))  # unbroken speech that cancels a started answer
+LIVE_PARTIAL_SECONDS = float(os.getenv("LIVE_PARTIAL_SECONDS", "8"))  # audio decoded per partial transcript
@@ -0,0 +1,183 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+# Document Processing Imports
+import pypdf
+import docx2txt
+from pptx import Presentation
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".pptx", ".txt"}
+
+# PDFs with more pages than this are split into page ranges for extraction
+DEFAULT_PAGES_PER_TASK = 16
+
+
+def extract_text_from_pdf(file_path: str) -> str:
+    """Extracts text from a PDF file."""
+    try:
+        reader = pypdf.PdfReader(file_path)
+        pages = [page.extract_text() or "" for page in reader.pages]
+        return "\n".join(pages)
+    except Exception as e:
+        print(f"[ERROR] PDF Extraction failed: {e}")
+        return ""
+
+
+def extract_text_from_pdf_pages(file_path: str, start: int, end: int) -> str:
+    """Extracts text from pages [start, end) of a PDF file."""
+    try:
+        reader = pypdf.PdfReader(file_path)
+        pages = [reader.pages[i].extract_text() or "" for i in range(start, min(end, len(reader.pages)))]
+        return "\n".join(pages)
+    except Exception as e:
+        print(f"[ERROR] PDF Extraction failed for pages {start}-{end}: {e}")
+        return ""
+
+
+def extract_text_from_docx(file_path: str) -> str:
+    """Extracts text from a DOCX file."""
+    try:
+        return docx2txt.process(file_path)
+    except Exception as e:
+        print(f"[ERROR] DOCX Extraction failed: {e}")
+        return ""
+
+
+def extract_text_from_pptx(file_path: str) -> str:
+    """Extracts text from a PPTX file."""
+    try:
+        prs = Presentation(file_path)
+        lines = []
+        for slide in prs.slides:
+            for shape in slide.shapes:
+                if hasattr(shape, "text") and shape.text:
+                    lines.append(shape.text)
+        return "\n".join(lines)
+    except Exception as e:
+        print(f"[ERROR] PPTX Extraction failed: {e}")
+        return ""
+
+
+def extract_text_from_txt(file_path: str) -> str:
+    """Extracts text from a plain text file."""
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
+    except Exception as e:
+        print(f"[ERROR] TXT Extraction failed: {e}")
+        return ""
+
+
+def extract_text(file_path: str) -> str:
+    """Dispatches to the extractor for the file's extension."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        return extract_text_from_pdf(file_path)
+    if ext == ".docx":
+        return extract_text_from_docx(file_path)
+    if ext == ".pptx":
+        return extract_text_from_pptx(file_path)
+    if ext == ".txt":
+        return extract_text_from_txt(file_path)
+    return ""
+
+
+def classify_subject(filename: str) -> str:
+    """Basic subject classification based on filename."""
+    name = filename.lower()
+    if "aejm" in name:
+        return "math"
+    if "aemr" in name:
+        return "reading"
+    return "general"
+
+
+def build_documents(filename: str, content: str) -> List[Dict[str, Any]]:
+    """Wraps extracted text in the raw document dicts the chunker expects."""
+    if not content.strip():
+        return []
+    return [{
+        "content": content,
+        "filename": filename,
+        "subject": classify_subject(filename),
+    }]
+
+
+def load_document_from_path(file_path: str) -> List[Dict[str, Any]]:
+    """Determines file type and extracts text accordingly."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        return []
+
+    try:
+        return build_documents(os.path.basename(file_path), extract_text(file_path))
+    except Exception as e:
+        print(f"[ERROR] Loading document failed: {e}")
+        return []
+
+
+# ----------------- PARALLEL EXTRACTION -----------------
+def _pdf_page_count(file_path: str) -> int:
+    try:
+        return len(pypdf.PdfReader(file_path).pages)
+    except Exception as e:
+        print(f"[ERROR] Could not read PDF page count: {e}")
+        return 0
+
+
+def plan_extraction_tasks(file_path: str, pages_per_task: int = DEFAULT_PAGES_PER_TASK) -> List[Tuple]:
+    """
+    Splits one file into extraction tasks. Large PDFs become several
+    (path, start, end) page ranges; everything else is a single task.
+    """
+    if os.path.splitext(file_path)[1].lower() == ".pdf" and pages_per_task > 0:
+        page_count = _pdf_page_count(file_path)
+        if page_count > pages_per_task:
+            return [
+                (file_path, start, min(start + pages_per_task, page_count))
+                for start in range(0, page_count, pages_per_task)
+            ]
+    return [(file_path, None, None)]
+
+
+def _run_extraction_task(task: Tuple) -> str:
+    file_path, start, end = task
+    if start is None:
+        return extract_text(file_path)
+    return extract_text_from_pdf_pages(file_path, start, end)
+
+
+def iter_extracted_documents(
+    file_paths: Iterable[str],
+    max_workers: Optional[int] = None,
+    pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Extracts text from many files on a process pool, splitting large PDFs
+    into page ranges. Yields (file_path, raw_docs) in input order as soon
+    as each file's ranges are all done, so chunking can start early.
+    """
+    paths = [p for p in file_paths if os.path.splitext(p)[1].lower() in SUPPORTED_EXTENSIONS]
+    if not paths:
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1:
+        for path in paths:
+            yield path, load_document_from_path(path)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Submit every range up front so workers stay busy while we consume in order
+        pending = [
+            (path, [executor.submit(_run_extraction_task, task) for task in plan_extraction_tasks(path, pages_per_task)])
+            for path in paths
+        ]
+        for path, futures in pending:
+            try:
+                content = "\n".join(f.result() for f in futures)
+                yield path, build_documents(os.path.basename(path), content)
+            except Exception as e:
+                print(f"[ERROR] Loading document failed: {e}")
+                yield path, []
@@ -0,0 +1,154 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from typing import List, Dict, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ingest_manifest import atomic_write_json
+
+
+def hash_text(text: str) -> str:
+    """Returns the SHA-256 hex digest of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding store for one (model name, normalize flag) pair.
+
+    Vectors live in a flat append-only binary file that is read through a
+    NumPy memmap; `index.json` maps each chunk-text hash to its row.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, normalize: bool, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.model_name = model_name
+        self.normalize = normalize
+        self.dtype = np.dtype(dtype)
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", model_name).strip("-")
+        self.dir = os.path.join(cache_dir, f"{slug}-{'norm' if normalize else 'raw'}-{dtype}")
+        self.vectors_path = os.path.join(self.dir, "vectors.bin")
+        self.index_path = os.path.join(self.dir, "index.json")
+
+        self.dim: Optional[int] = None
+        self.rows: Dict[str, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("model_name") == self.model_name and data.get("normalize") == self.normalize:
+                    self.dim = data.get("dim")
+                    self.rows = data.get("rows", {})
+            except Exception as e:
+                print(f"[WARNING] Could not read embedding cache index, starting fresh: {e}")
+                self.dim, self.rows = None, {}
+
+        # Rows appended after the last index write (e.g. a crash) are orphans; drop them
+        expected = len(self.rows) * (self.dim or 0) * self.dtype.itemsize
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) != expected:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(expected)
+        self._remap()
+
+    def _remap(self) -> None:
+        if self.rows and self.dim:
+            self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(len(self.rows), self.dim))
+        else:
+            self._vectors = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Returns the cached float32 vectors for whichever keys are present."""
+        with self._lock:
+            if self._vectors is None:
+                return {}
+            return {
+                key: np.asarray(self._vectors[self.rows[key]], dtype=np.float32)
+                for key in keys
+                if key in self.rows
+            }
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]) -> None:
+        """Appends new vectors, then atomically rewrites the hash index."""
+        with self._lock:
+            new = [(k, v) for k, v in zip(keys, vectors) if k not in self.rows]
+            if not new:
+                return
+            matrix = np.asarray([v for _, v in new], dtype=self.dtype)
+            if self.dim is None:
+                self.dim = int(matrix.shape[1])
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension changed from {self.dim} to {matrix.shape[1]}")
+
+            with open(self.vectors_path, "ab") as f:
+                f.write(matrix.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            start = len(self.rows)
+            for offset, (key, _) in enumerate(new):
+                self.rows[key] = start + offset
+            atomic_write_json(self.index_path, {
+                "model_name": self.model_name,
+                "normalize": self.normalize,
+                "dtype": self.dtype.name,
+                "dim": self.dim,
+                "rows": self.rows,
+            })
+            self._remap()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends cache misses to the underlying
+    encoder, in batches of `batch_size`. Query embeddings pass through.
+    """
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache, batch_size: int = 256):
+        self.base = base
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [hash_text(t) for t in texts]
+        found = self.cache.get_many(keys)
+
+        # Encode each distinct missing text once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        self.hits += len(texts) - sum(1 for k in keys if k in missing)
+        self.misses += len(missing)
+
+        if missing:
+            miss_keys = list(missing)
+            for i in range(0, len(miss_keys), self.batch_size):
+                batch_keys = miss_keys[i:i + self.batch_size]
+                batch_vectors = self.base.embed_documents([missing[k] for k in batch_keys])
+                self.cache.put_many(batch_keys, batch_vectors)
+                for key, vector in zip(batch_keys, batch_vectors):
+                    found[key] = np.asarray(vector, dtype=np.float32)
+            if len(texts) > 1:
+                print(f"[EMBED] {len(texts)} chunk(s): {len(texts) - len(missing)} cached, {len(missing)} encoded")
+
+        return [found[k].tolist() for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
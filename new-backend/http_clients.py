@@ -0,0 +1,126 @@
+"""
+Shared, pooled HTTP clients for every outbound call in the backend.
+
+One keep-alive connection pool per process instead of a new TCP+TLS
+handshake per request:
+
+- `http_session()`: a `requests.Session` (sync code: TTS downloads, image
+  fetches) with per-host pool limits, a default timeout and retry with
+  exponential backoff for idempotent requests. `http_session(retry=False)`
+  is the same without retries, for callers working to a deadline.
+- `async_http_client()` / `async_request()`: an `httpx.AsyncClient` for
+  async routes (the lecture proxy), with the same limits and retry policy.
+- `murf_client(api_key)`: one Murf SDK client per API key, on a pooled
+  httpx client.
+"""
+import asyncio
+import threading
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import HTTP_TIMEOUT, HTTP_POOL_MAXSIZE, HTTP_RETRIES, HTTP_BACKOFF, MURF_TIMEOUT
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_lock = threading.Lock()
+_sessions: Dict[bool, requests.Session] = {}
+_async_client: Optional[httpx.AsyncClient] = None
+_murf_clients: Dict[str, object] = {}
+
+
+class _TimeoutSession(requests.Session):
+    """Session that applies HTTP_TIMEOUT when the caller doesn't pass one."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", HTTP_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+def http_session(retry: bool = True) -> requests.Session:
+    """
+    The shared session. With `retry=False` each request is tried once, so a
+    caller with a deadline decides itself whether another attempt still fits.
+    """
+    session = _sessions.get(retry)
+    if session is None:
+        with _lock:
+            session = _sessions.get(retry)
+            if session is None:
+                max_retries = Retry(
+                    total=HTTP_RETRIES,
+                    backoff_factor=HTTP_BACKOFF,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset(IDEMPOTENT_METHODS),
+                    raise_on_status=False,
+                ) if retry else 0
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=max_retries)
+                session = _TimeoutSession()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _sessions[retry] = session
+    return session
+
+
+def _httpx_limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=HTTP_POOL_MAXSIZE * 4, max_keepalive_connections=HTTP_POOL_MAXSIZE)
+
+
+def async_http_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=_httpx_limits(),
+        )
+    return _async_client
+
+
+async def async_request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Sends a request on the shared async client, retrying idempotent ones with backoff."""
+    client = async_http_client()
+    attempts = HTTP_RETRIES + 1 if method.upper() in IDEMPOTENT_METHODS else 1
+    for attempt in range(attempts):
+        last_attempt = attempt == attempts - 1
+        try:
+            response = await client.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+        except (httpx.TimeoutException, httpx.NetworkError):
+            if last_attempt:
+                raise
+        await asyncio.sleep(HTTP_BACKOFF * (2 ** attempt))
+
+
+async def close_async_http_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+def murf_client(api_key: str):
+    """Shared Murf SDK client for `api_key` (creating one per call re-dials the API)."""
+    client = _murf_clients.get(api_key)
+    if client is None:
+        with _lock:
+            client = _murf_clients.get(api_key)
+            if client is None:
+                from murf import Murf
+                pooled = httpx.Client(
+                    timeout=MURF_TIMEOUT,
+                    limits=_httpx_limits(),
+                    transport=httpx.HTTPTransport(retries=HTTP_RETRIES),
+                )
+                try:
+                    client = Murf(api_key=api_key, httpx_client=pooled)
+                except TypeError:
+                    # Older SDKs build their own httpx client
+                    pooled.close()
+                    client = Murf(api_key=api_key)
+                _murf_clients[api_key] = client
+    return client
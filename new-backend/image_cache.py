@@ -0,0 +1,262 @@
+import io
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ingest_manifest import atomic_write_json
+
+FILE_PREFIX = "img-"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, spacing and trailing punctuation don't change the picture."""
+    return re.sub(r"\s+", " ", prompt).strip().strip(".,;:!").lower()
+
+
+def prompt_cache_key(prompt: str) -> str:
+    return hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+
+NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+}
+COLOUR_WORDS = {
+    "red", "orange", "yellow", "green", "blue", "purple", "violet", "pink", "brown",
+    "black", "white", "grey", "gray", "gold", "golden", "silver",
+}
+FILLER_WORDS = {"a", "an", "the", "of", "and", "with", "on", "in", "at", "some"}
+
+
+def prompt_family(prompt: str) -> str:
+    """
+    What two prompts must agree on before their images may be merged by
+    look: the same numbers and colours, and otherwise the same words
+    ignoring order, plurals and filler. "3 red apples" and "three apples,
+    red" share a family; "3 red apples" and "5 red apples" don't.
+    """
+    numbers, colours, words = [], [], set()
+    for word in re.findall(r"[a-z]+|\d+", normalize_prompt(prompt)):
+        word = NUMBER_WORDS.get(word, word)
+        if word.isdigit():
+            numbers.append(word)
+        elif word in COLOUR_WORDS:
+            colours.append(word)
+        elif word not in FILLER_WORDS:
+            words.add(word[:-1] if len(word) > 3 and word.endswith("s") else word)
+    return " ".join(sorted(numbers)) + "|" + " ".join(sorted(colours)) + "|" + " ".join(sorted(words))
+
+
+def perceptual_hash(data: bytes) -> Optional[int]:
+    """64-bit difference hash of an image, or None if Pillow is missing or the bytes aren't an image."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            pixels = list(image.convert("L").resize((9, 8)).getdata())
+    except Exception:
+        return None
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+class ImageCache:
+    """
+    Persistent store of generated teaching images, keyed by normalized prompt.
+
+    A hit returns the saved file without touching the network. Byte-identical
+    images are always stored once. With `max_distance` >= 0, a new image is
+    also compared by perceptual hash to stored images whose prompts are in
+    the same `prompt_family`, and a near-identical one is reused instead of
+    being written again; images for different counts or colours are never
+    merged. Total size is capped at `max_bytes`; least recently used prompts
+    are dropped first, except prompts whose path was returned in the last
+    `grace_seconds` (a client may still be about to fetch it), and a file is
+    deleted once no prompt points at it.
+    The index lives in `index_path`, by default next to `folder`.
+    """
+
+    def __init__(self, folder: str, max_bytes: int, max_distance: int = -1, index_path: Optional[str] = None,
+                 grace_seconds: float = 600.0):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.grace_seconds = grace_seconds
+        self.max_distance = max_distance
+        self.index_path = index_path or os.path.normpath(folder) + "_image_cache.json"
+        # key -> file name, least recently used first
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        # file name -> {"size", "phash", "family"}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self.evictions = 0
+        self._handed_out: Dict[str, float] = {}   # key -> when its path was last returned
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        self._load()
+
+    # ---------------- Persistence ----------------
+    def _load(self) -> None:
+        index_path = self.index_path
+        legacy_path = os.path.join(self.folder, "image_cache.json")
+        if not os.path.exists(index_path) and os.path.exists(legacy_path):
+            # Older versions kept the index inside the served folder
+            index_path = legacy_path
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for name, info in data.get("files", {}).items():
+                    if os.path.exists(os.path.join(self.folder, name)):
+                        self.files[name] = info
+                        self.total_bytes += info["size"]
+                for key, name in data.get("entries", []):
+                    if name in self.files:
+                        self.entries[key] = name
+            except Exception as e:
+                print(f"[WARNING] Could not read image cache index, starting fresh: {e}")
+                self.entries, self.files, self.total_bytes = OrderedDict(), {}, 0
+        if os.path.exists(legacy_path):
+            self._save_locked()
+            try:
+                os.remove(legacy_path)
+            except OSError:
+                pass
+
+        # Files no prompt points at any more, or written before a crash but never indexed
+        referenced = set(self.entries.values())
+        for name in list(self.files):
+            if name not in referenced:
+                self._delete_file_locked(name)
+        for name in os.listdir(self.folder):
+            if name.startswith(FILE_PREFIX) and name not in self.files:
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+
+    def _save_locked(self) -> None:
+        try:
+            atomic_write_json(self.index_path, {"entries": list(self.entries.items()), "files": self.files})
+        except Exception as e:
+            print(f"[WARNING] Could not save image cache index: {e}")
+
+    # ---------------- Lookup ----------------
+    def get(self, prompt: str) -> Optional[str]:
+        """Returns the path of the cached image for `prompt`, or None."""
+        key = prompt_cache_key(prompt)
+        with self._lock:
+            name = self.entries.get(key)
+            path = os.path.join(self.folder, name) if name else None
+            if name is None or not os.path.exists(path):
+                if name is not None:
+                    # Deleted behind our back
+                    del self.entries[key]
+                    self._handed_out.pop(key, None)
+                    self._release_locked(name)
+                self.misses += 1
+                return None
+            # LRU order is persisted with the next put
+            self.entries.move_to_end(key)
+            self._handed_out[key] = time.monotonic()
+            self.hits += 1
+            return path
+
+    def put(self, prompt: str, data: bytes, suffix: str = ".png") -> str:
+        """Stores the image generated for `prompt` and returns its path (possibly an existing look-alike)."""
+        key = prompt_cache_key(prompt)
+        family = prompt_family(prompt)
+        phash = perceptual_hash(data) if self.max_distance >= 0 else None
+
+        with self._lock:
+            name = self._similar_locked(phash, family)
+            if name is not None:
+                self.deduplicated += 1
+            else:
+                name = f"{FILE_PREFIX}{hashlib.sha256(data).hexdigest()[:32]}{suffix}"
+                if name not in self.files:
+                    self._write(name, data)
+                    self.files[name] = {"size": len(data), "phash": phash, "family": family}
+                    self.total_bytes += len(data)
+
+            previous = self.entries.pop(key, None)
+            self.entries[key] = name
+            if previous is not None and previous != name:
+                self._release_locked(previous)
+            self._handed_out[key] = time.monotonic()
+            self._evict_locked(keep=key)
+            self._save_locked()
+            return os.path.join(self.folder, name)
+
+    def _similar_locked(self, phash: Optional[int], family: str) -> Optional[str]:
+        if phash is None:
+            return None
+        best, best_distance = None, self.max_distance + 1
+        for name, info in self.files.items():
+            if info.get("phash") is None or info.get("family") != family:
+                continue
+            distance = bin(phash ^ info["phash"]).count("1")
+            if distance < best_distance:
+                best, best_distance = name, distance
+        return best
+
+    def _write(self, name: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, prefix=".tmp-", suffix=os.path.splitext(name)[1])
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.folder, name))
+
+    # ---------------- Eviction ----------------
+    def _release_locked(self, name: str) -> None:
+        """Deletes `name` if no prompt points at it any more."""
+        if name in self.files and name not in self.entries.values():
+            self._delete_file_locked(name)
+
+    def _delete_file_locked(self, name: str) -> None:
+        self.total_bytes -= self.files.pop(name)["size"]
+        try:
+            os.remove(os.path.join(self.folder, name))
+        except OSError:
+            pass
+
+    def _evict_locked(self, keep: str) -> None:
+        now = time.monotonic()
+        for key in list(self.entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            # Recently returned images may still be fetched; the cap is exceeded for a while instead
+            if key == keep or now - self._handed_out.get(key, float("-inf")) < self.grace_seconds:
+                continue
+            name = self.entries.pop(key)
+            self._handed_out.pop(key, None)
+            self.evictions += 1
+            self._release_locked(name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "prompts": len(self.entries),
+                "files": len(self.files),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "deduplicated": self.deduplicated,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
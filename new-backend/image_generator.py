@@ -1,10 +1,96 @@
 import os
+import re
 import time
 import json
 import requests
-import uuid
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from groq import Groq
+from http_clients import http_session, RETRY_STATUSES
+from image_cache import ImageCache
+from image_plan_cache import ImagePlanCache
+from config import (
+    HTTP_RETRIES,
+    HTTP_BACKOFF,
+    IMAGE_DEADLINE_SECONDS,
+    IMAGE_FETCH_WORKERS,
+    IMAGE_CACHE_MAX_MB,
+    IMAGE_DEDUP_MAX_DISTANCE,
+    IMAGE_CACHE_INDEX,
+    IMAGE_CACHE_GRACE_SECONDS,
+    IMAGE_PLAN_CACHE_SIZE,
+    IMAGE_PLAN_CACHE_TTL,
+    IMAGE_PLAN_CACHE_PATH,
+    IMAGE_PLAN_LOCAL_MAX_WORDS,
+)
+
+PLAN_MODEL = "llama-3.3-70b-versatile"
+WORDS_PER_SECOND = 2.5
+PROMPT_STYLE = "on white background, simple illustration, child-friendly, educational style"
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+# Words that follow a number without naming something to draw ("3 plus 2", "5 is more", "2 days")
+NOT_OBJECTS = {
+    "and", "or", "is", "are", "was", "were", "plus", "minus", "times", "equals", "more", "less",
+    "of", "to", "the", "a", "an", "in", "on", "at", "from", "by", "with", "we", "you", "it", "then",
+    "together", "total", "left", "all", "make", "makes", "gives", "divided", "multiplied",
+    "than", "but", "so", "if", "for", "as", "that", "this", "can", "will", "has", "have", "each",
+    "other", "ones", "again", "only", "first", "next", "last", "way", "ways", "step", "steps",
+    "time", "day", "days", "week", "weeks", "month", "months", "year", "years", "old",
+    "hour", "hours", "minute", "minutes", "second", "seconds", "number", "numbers",
+}
+_COUNTED_OBJECT = re.compile(
+    r"\b(\d+|" + "|".join(NUMBER_WORDS) + r")\s+([a-z]+)(?:\s+([a-z]+))?",
+    re.IGNORECASE,
+)
+
+
+def plan_images_locally(text, max_images=2, words_per_second=WORDS_PER_SECOND):
+    """
+    Cheap stand-in for the LLM planner: one image per counted object the
+    text mentions ("2 red apples", "three oranges"), each shown from where
+    it is first mentioned until the next one at `words_per_second`.
+
+    Returns:
+        list: Prompt dictionaries like analyze_teaching_content, possibly empty
+    """
+    found = []
+    seen = set()
+    for match in _COUNTED_OBJECT.finditer(text):
+        count, first, second = match.group(1), match.group(2).lower(), (match.group(3) or "").lower()
+        if first in NOT_OBJECTS:
+            continue
+        thing = first if not second or second in NOT_OBJECTS else f"{first} {second}"
+        description = f"{NUMBER_WORDS.get(count.lower(), count)} {thing}"
+        if description in seen:
+            continue
+        seen.add(description)
+        found.append((len(text[:match.start()].split()), description))
+        if len(found) == max_images:
+            break
+
+    total_words = len(text.split())
+    prompts = []
+    for idx, (start_word, description) in enumerate(found):
+        start = 0 if idx == 0 else start_word
+        end = found[idx + 1][0] if idx + 1 < len(found) else total_words
+        prompts.append({
+            "description": description,
+            "prompt": f"{description} {PROMPT_STYLE}",
+            "duration": round(max(end - start, 1) / words_per_second, 1),
+        })
+    return prompts
+
+
+def looks_english(text):
+    """True when nearly all letters are ASCII; the local planner only knows English words."""
+    letters = [c for c in text if c.isalpha()]
+    return bool(letters) and sum(c.isascii() for c in letters) >= 0.9 * len(letters)
+
 
 class ImageGenerator:
     """
@@ -16,11 +102,34 @@ class ImageGenerator:
     5. Returns image URLs with timing information
     """
     
-    def __init__(self, groq_api_key, output_dir="./static/generated_images"):
+    def __init__(self, groq_api_key, output_dir="./static/generated_images",
+                 deadline_seconds=IMAGE_DEADLINE_SECONDS, max_workers=IMAGE_FETCH_WORKERS):
         self.groq_client = Groq(api_key=groq_api_key)
+        # Latency budget for fetching all images of one answer, and how many run at once
+        self.deadline_seconds = deadline_seconds
+        self.max_workers = max_workers
         
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.image_cache = ImageCache(
+            str(self.output_dir),
+            max_bytes=IMAGE_CACHE_MAX_MB * 1024 * 1024,
+            max_distance=IMAGE_DEDUP_MAX_DISTANCE,
+            index_path=str(IMAGE_CACHE_INDEX),
+            grace_seconds=IMAGE_CACHE_GRACE_SECONDS,
+        )
+        # Prompt plans per answer text, so a repeated answer skips the LLM
+        legacy_plans = self.output_dir / "image_plans.json"
+        if legacy_plans.exists() and not IMAGE_PLAN_CACHE_PATH.exists():
+            # Older versions kept the plans in the served image folder
+            IMAGE_PLAN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(legacy_plans, IMAGE_PLAN_CACHE_PATH)
+        self.plan_cache = ImagePlanCache(
+            str(IMAGE_PLAN_CACHE_PATH),
+            maxsize=IMAGE_PLAN_CACHE_SIZE,
+            ttl=IMAGE_PLAN_CACHE_TTL,
+        )
+        self.local_plan_max_words = IMAGE_PLAN_LOCAL_MAX_WORDS
         
         print(f"[Image Generator] Initialized with Pollinations.ai (free, no auth)")
         print(f"[Image Generator] Groq API Key present: {bool(groq_api_key)}")
@@ -35,6 +144,18 @@ class ImageGenerator:
         Returns:
             list: List of image prompt dictionaries with duration
         """
+        word_count = len(ai_response.split())
+        if word_count <= self.local_plan_max_words and looks_english(ai_response):
+            prompts = plan_images_locally(ai_response)
+            if prompts:
+                print(f"[Image Generator] Planned {len(prompts)} image prompts locally ({word_count} words)")
+                return prompts
+            # Nothing countable found; the cache or the LLM may still find something to draw
+
+        cached = self.plan_cache.get(ai_response, PLAN_MODEL)
+        if cached is not None:
+            print(f"[Image Generator] ♻️ Reusing {len(cached)} cached image prompts")
+            return cached
         
         prompt = f"""You are an educational image prompt generator for young students (grade 1-2).
 
@@ -84,7 +205,7 @@ Return ONLY valid JSON, no other text:"""
 
         try:
             completion = self.groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
+                model=PLAN_MODEL,
                 messages=[
                     {
                         "role": "system",
@@ -115,58 +236,68 @@ Return ONLY valid JSON, no other text:"""
                     prompts = []
             
             print(f"[Image Generator] Generated {len(prompts)} image prompts")
+            self.plan_cache.put(ai_response, PLAN_MODEL, prompts)
             return prompts
             
         except Exception as e:
             print(f"[Image Generator] Error analyzing content: {e}")
             return []
     
-    def generate_image_pollinations(self, prompt):
+    def generate_image_pollinations(self, prompt, deadline=None, cancelled=None):
         """
         Generate image using Pollinations.ai (free, no authentication required).
         
         Args:
             prompt (str): Text prompt for image generation
+            deadline (float, optional): time.monotonic() value after which to give up
+            cancelled (threading.Event, optional): Set to abandon the download
             
         Returns:
             str: Path to saved image or None
         """
+        cached = self.image_cache.get(prompt)
+        if cached:
+            print(f"[Image Generator] ♻️ Cached image for: {prompt[:50]}...")
+            return cached
+
         try:
             print(f"[Image Generator] Calling Pollinations.ai with prompt: {prompt[:50]}...")
             
-            # Construct Pollinations.ai URL with timestamp to avoid caching
-            url = f"https://image.pollinations.ai/prompt/{requests.utils.quote(prompt)}?nologo=true&t={int(time.time())}"
+            # Same prompt -> same picture; repeats are served from the local cache above
+            url = f"https://image.pollinations.ai/prompt/{requests.utils.quote(prompt)}?nologo=true"
             
-            # Download image with retries
-            max_retries = 3
-            for attempt in range(max_retries):
+            # Retried here rather than by the session, so no attempt outlives the deadline
+            content = None
+            for attempt in range(HTTP_RETRIES + 1):
+                if attempt:
+                    backoff = HTTP_BACKOFF * (2 ** (attempt - 1))
+                    if cancelled is None:
+                        time.sleep(backoff)
+                    elif cancelled.wait(backoff):
+                        break
+                timeout = 60
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0 or (cancelled is not None and cancelled.is_set()):
+                    break
                 try:
-                    response = requests.get(url, timeout=60)
-                    
-                    if response.status_code == 200:
-                        # Save image
-                        filename = f"edu_{uuid.uuid4().hex[:8]}.png"
-                        filepath = self.output_dir / filename
-                        
-                        with open(filepath, "wb") as f:
-                            f.write(response.content)
-                        
-                        print(f"[Image Generator] ✅ Image saved: {filepath}")
-                        return str(filepath)
-                    else:
-                        print(f"[Image Generator] ❌ Server returned status {response.status_code}")
-                        if attempt < max_retries - 1:
-                            print(f"[Image Generator] Retrying ({attempt + 2}/{max_retries})...")
-                            time.sleep(2)
-                        
-                except requests.exceptions.Timeout:
-                    if attempt < max_retries - 1:
-                        print(f"[Image Generator] ⏱️ Timeout, retrying ({attempt + 2}/{max_retries})...")
-                        time.sleep(2)
-                    else:
-                        raise
-            
-            return None
+                    status, content = self._fetch_once(url, timeout, deadline, cancelled)
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                    print(f"[Image Generator] ⏱️ Attempt {attempt + 1} failed: {e}")
+                    continue
+                if status == 200 or status not in RETRY_STATUSES:
+                    break
+                print(f"[Image Generator] ❌ Server returned status {status}, retrying")
+
+            if content is None:
+                print(f"[Image Generator] ⏱️ Gave up on: {prompt[:50]}...")
+                return None
+
+            # Save image (or reuse a stored look-alike)
+            filepath = self.image_cache.put(prompt, content)
+
+            print(f"[Image Generator] ✅ Image saved: {filepath}")
+            return filepath
             
         except Exception as e:
             print(f"[Image Generator] ❌ Error: {e}")
@@ -174,12 +305,32 @@ Return ONLY valid JSON, no other text:"""
             traceback.print_exc()
             return None
     
-    def generate_images_for_teaching(self, ai_response):
+    @staticmethod
+    def _fetch_once(url, timeout, deadline=None, cancelled=None):
+        """
+        One download attempt. Returns (status, bytes); bytes is None unless
+        the status is 200 and the whole image arrived before the deadline.
+        """
+        with http_session(retry=False).get(url, timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                print(f"[Image Generator] ❌ Server returned status {response.status_code}")
+                return response.status_code, None
+
+            content = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if (cancelled is not None and cancelled.is_set()) or (deadline and time.monotonic() > deadline):
+                    print(f"[Image Generator] ⏱️ Abandoned after the deadline: {url[:80]}...")
+                    return 200, None
+                content.extend(chunk)
+            return 200, bytes(content)
+    
+    def generate_images_for_teaching(self, ai_response, on_image=None):
         """
         Complete pipeline: analyze content → generate prompts → create images with LLM-calculated timing.
         
         Args:
             ai_response (str): Teaching content from RAG system
+            on_image (callable, optional): Called with each image dict as soon as it is saved
             
         Returns:
             list: List of image paths with timing info
@@ -193,8 +344,7 @@ Return ONLY valid JSON, no other text:"""
         
         # Step 2: Calculate start times based on durations
         current_time = 0
-        image_paths = []
-        
+        slots = []
         for idx, prompt_obj in enumerate(prompts):
             prompt = prompt_obj.get("prompt", "")
             description = prompt_obj.get("description", f"Step {idx + 1}")
@@ -206,22 +356,44 @@ Return ONLY valid JSON, no other text:"""
             print(f"[Image Generator] Image {idx + 1}: '{description}'")
             print(f"[Image Generator]   Time: {start_time:.1f}s → {end_time:.1f}s (duration: {duration:.1f}s)")
             
-            image_path = self.generate_image_pollinations(prompt)
-            
-            if image_path:
-                image_paths.append({
-                    "path": image_path,
-                    "description": description,
-                    "prompt": prompt,
-                    "step": idx + 1,
-                    "start_time": round(start_time, 2),
-                    "end_time": round(end_time, 2),
-                    "duration": round(duration, 2)
-                })
+            slots.append({
+                "description": description,
+                "prompt": prompt,
+                "step": idx + 1,
+                "start_time": round(start_time, 2),
+                "end_time": round(end_time, 2),
+                "duration": round(duration, 2)
+            })
             
             # Move to next time slot
             current_time = end_time
         
+        # Step 3: Fetch all images at once; whatever misses the deadline is dropped
+        deadline = time.monotonic() + self.deadline_seconds
+        cancelled = threading.Event()
+        image_paths = []
+        pool = ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix="image-fetch")
+        futures = {
+            pool.submit(self.generate_image_pollinations, slot["prompt"], deadline, cancelled): slot
+            for slot in slots
+        }
+        try:
+            for future in as_completed(futures, timeout=self.deadline_seconds):
+                image_path = future.result()
+                if image_path:
+                    image = {"path": image_path, **futures[future]}
+                    image_paths.append(image)
+                    if on_image:
+                        on_image(image)
+        except FuturesTimeout:
+            missing = sum(1 for f in futures if not f.done())
+            print(f"[Image Generator] ⏱️ Deadline of {self.deadline_seconds:.0f}s reached, dropping {missing} image(s)")
+        finally:
+            # Stragglers stop at their next chunk and are never saved
+            cancelled.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        image_paths.sort(key=lambda image: image["step"])
         total_duration = current_time
         print(f"[Image Generator] Successfully generated {len(image_paths)}/{len(prompts)} images")
         print(f"[Image Generator] Total slideshow duration: {total_duration:.1f}s")
@@ -0,0 +1,98 @@
+import time
+import asyncio
+import uuid
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ImageJob:
+    """Teaching images for one answer, filled in as they finish."""
+
+    def __init__(self, answer: str):
+        self.id = uuid.uuid4().hex
+        self.answer = answer
+        self.state = "pending"   # pending -> running -> done | failed | rejected
+        self.images: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed", "rejected")
+
+    def to_dict(self, since: int = 0) -> Dict[str, Any]:
+        """`since` skips images the caller already has (for polling)."""
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "finished": self.finished,
+            "images": self.images[since:],
+            "count": len(self.images),
+            "error": self.error,
+        }
+
+
+class ImageJobStore:
+    """
+    In-memory registry of background image jobs. Finished jobs are kept
+    for `ttl` seconds so clients can still poll them; `wait_for_change`
+    lets a push endpoint await a job gaining an image or finishing.
+    """
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self._jobs: Dict[str, ImageJob] = {}
+        # job id -> (loop, event) of every wait_for_change in progress
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._changed = threading.Lock()
+
+    def create(self, answer: str) -> ImageJob:
+        job = ImageJob(answer)
+        with self._changed:
+            self._prune_locked()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ImageJob]:
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def update(self, job: ImageJob, state: Optional[str] = None, image: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None) -> None:
+        with self._changed:
+            if image is not None:
+                job.images.append(image)
+            if error is not None:
+                job.error = error
+            if state is not None:
+                job.state = state
+                if job.finished:
+                    job.finished_at = time.time()
+            waiters = list(self._waiters.get(job.id, ()))
+        # update() runs on worker threads; wake each waiter on its own loop
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait_for_change(self, job: ImageJob, seen: int, timeout: float) -> None:
+        """Returns once `job` has more than `seen` images, finishes, or `timeout` passes."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._changed:
+            if len(job.images) > seen or job.finished:
+                return
+            self._waiters.setdefault(job.id, []).append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._changed:
+                waiters = self._waiters.get(job.id, [])
+                waiters.remove(waiter)
+                if not waiters:
+                    self._waiters.pop(job.id, None)
+
+    def _prune_locked(self) -> None:
+        now = time.time()
+        for job_id in [j.id for j in self._jobs.values() if j.finished and now - j.finished_at > self.ttl]:
+            del self._jobs[job_id]
@@ -0,0 +1,97 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from ingest_manifest import atomic_write_json
+
+
+def answer_key(answer: str, model: str) -> str:
+    normalized = re.sub(r"\s+", " ", answer).strip()
+    return hashlib.sha256(f"{model}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+class ImagePlanCache:
+    """
+    Remembers the image prompts (and durations) planned for an answer.
+
+    Keyed by a hash of the answer text and the planning model, so an answer
+    that comes back verbatim (answer cache hits, repeated questions) skips
+    the LLM call. Entries expire after `ttl` seconds, the least recently
+    used are evicted past `maxsize`, and the cache is written to `path` as
+    JSON so it survives restarts.
+    """
+
+    def __init__(self, path: str, maxsize: int = 2000, ttl: Optional[float] = 7 * 86400.0):
+        self.path = path
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        # key -> {"prompts", "created"}, least recently used first
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, entry in data.get("entries", []):
+                if not self._expired(entry):
+                    self._entries[key] = entry
+        except Exception as e:
+            print(f"[WARNING] Could not read image plan cache, starting fresh: {e}")
+            self._entries = OrderedDict()
+
+    def _save(self) -> None:
+        with self._lock:
+            payload = {"entries": list(self._entries.items())}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        try:
+            atomic_write_json(self.path, payload)
+        except Exception as e:
+            print(f"[WARNING] Could not save image plan cache: {e}")
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl is not None and time.time() - entry["created"] > self.ttl
+
+    def get(self, answer: str, model: str) -> Optional[List[Dict[str, Any]]]:
+        key = answer_key(answer, model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(p) for p in entry["prompts"]]
+
+    def put(self, answer: str, model: str, prompts: List[Dict[str, Any]]) -> None:
+        key = answer_key(answer, model)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = {"prompts": prompts, "created": time.time()}
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
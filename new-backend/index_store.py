@@ -0,0 +1,339 @@
+import os
+import re
+import json
+import pickle
+import tempfile
+import threading
+from typing import List, Optional, Any
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+
+from ingest_manifest import atomic_write_json
+from ann_index import IndexSpec, build_faiss_index, apply_search_params, index_kind, supports_remove
+
+STORE_MANIFEST = "store.json"
+LEGACY_INDEX_NAME = "index"
+
+
+def atomic_write_pickle(path: str, payload: Any) -> None:
+    """Pickles to a temp file next to `path` and renames it into place."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".pkl")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class IndexStore:
+    """
+    Owns the FAISS vector store and its on-disk persistence.
+
+    The folder holds a base snapshot written by `FAISS.save_local` plus
+    append-only segment files, each recording the adds/deletes of one
+    commit. `store.json` names the current base and the segments to replay
+    on top of it. Every file is written to a temp name and renamed, and the
+    manifest is replaced last, so a crash mid-save leaves the previous
+    state loadable. Segments are folded into a new base by a background
+    compaction thread.
+
+    With `incremental=False` every commit writes a full snapshot instead.
+
+    `spec` selects the FAISS index type. The store starts flat and is
+    retrained into the requested type once it passes the spec's size
+    threshold; the spec is saved in `store.json` with the index. When no
+    spec is given the persisted one is kept.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        embeddings,
+        incremental: bool = True,
+        compact_after: int = 8,
+        spec: Optional[IndexSpec] = None,
+    ):
+        self.folder = folder
+        self.embeddings = embeddings
+        self.incremental = incremental
+        self.compact_after = max(1, compact_after)
+        self.manifest_path = os.path.join(folder, STORE_MANIFEST)
+        self.requested_spec = spec
+        self.spec = spec or IndexSpec("flat")
+        self.trained_on = 0
+
+        self.vector_store: Optional[FAISS] = None
+        self.base: Optional[str] = None
+        self.segments: List[str] = []
+        self.next_seq = 1
+
+        self._pending: List[tuple] = []
+        self._reset_pending = False
+        self._generation = 0
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
+
+    # ---------------- Loading ----------------
+    def load(self) -> Optional[FAISS]:
+        """Loads the base snapshot and replays any segments on top of it."""
+        with self._lock:
+            self._read_manifest()
+            self.vector_store = None
+            if self.base:
+                self.vector_store = FAISS.load_local(
+                    self.folder,
+                    self.embeddings,
+                    index_name=self.base,
+                    allow_dangerous_deserialization=True
+                )
+                apply_search_params(self.spec, self.vector_store.index)
+            for segment in self.segments:
+                with open(os.path.join(self.folder, segment), "rb") as f:
+                    self._apply_ops(pickle.load(f))
+            self._remove_unreferenced_files()
+            self._maybe_rebuild_locked()
+            return self.vector_store
+
+    def _read_manifest(self) -> None:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.base = data.get("base")
+            self.segments = data.get("segments", [])
+            self.next_seq = data.get("next_seq", 1)
+            self.trained_on = data.get("trained_on", 0)
+            if self.requested_spec is None:
+                self.spec = IndexSpec.from_dict(data.get("index_spec"))
+        elif os.path.exists(os.path.join(self.folder, f"{LEGACY_INDEX_NAME}.faiss")):
+            # Plain save_local() output from before segments existed
+            self.base, self.segments, self.next_seq = LEGACY_INDEX_NAME, [], 1
+        else:
+            self.base, self.segments, self.next_seq = None, [], 1
+
+    def _write_manifest(self) -> None:
+        atomic_write_json(self.manifest_path, {
+            "base": self.base,
+            "segments": self.segments,
+            "next_seq": self.next_seq,
+            "index_spec": self.spec.to_dict(),
+            "trained_on": self.trained_on,
+        })
+
+    def _remove_unreferenced_files(self) -> None:
+        """Deletes snapshot/segment files left behind by a crash or compaction."""
+        if not os.path.isdir(self.folder):
+            return
+        keep = set(self.segments)
+        if self.base:
+            keep.update({f"{self.base}.faiss", f"{self.base}.pkl"})
+        for name in os.listdir(self.folder):
+            if name in keep or name == STORE_MANIFEST:
+                continue
+            if re.match(r"^(snapshot-\d+\.(faiss|pkl)|seg-\d+\.pkl|\.tmp-.*|index\.(faiss|pkl))$", name):
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError as e:
+                    print(f"[WARNING] Could not remove stale index file {name}: {e}")
+
+    # ---------------- Mutations ----------------
+    def add_documents(self, documents: List[Document], ids: List[str]) -> None:
+        if not documents:
+            return
+        texts = [d.page_content for d in documents]
+        metadatas = [d.metadata for d in documents]
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        op = ("add", list(ids), vectors, texts, metadatas)
+        with self._lock:
+            self._apply_ops([op])
+            self._pending.append(op)
+
+    def delete(self, ids: List[str]) -> None:
+        if not ids:
+            return
+        op = ("delete", list(ids))
+        with self._lock:
+            self._apply_ops([op])
+            self._pending.append(op)
+
+    def reset(self) -> None:
+        """Drops every vector; the next commit replaces what is on disk."""
+        with self._lock:
+            self.vector_store = None
+            self._pending = []
+            self._reset_pending = True
+            self._generation += 1
+            self.trained_on = 0
+
+    def _apply_ops(self, ops: List[tuple]) -> None:
+        for op in ops:
+            if op[0] == "add":
+                _, ids, vectors, texts, metadatas = op
+                pairs = list(zip(texts, vectors.tolist()))
+                if self.vector_store is None:
+                    self.vector_store = FAISS.from_embeddings(pairs, self.embeddings, metadatas=metadatas, ids=ids)
+                else:
+                    self.vector_store.add_embeddings(pairs, metadatas=metadatas, ids=ids)
+            elif op[0] == "delete" and self.vector_store is not None:
+                known = set(self.vector_store.index_to_docstore_id.values())
+                ids = [i for i in op[1] if i in known]
+                if not ids:
+                    continue
+                if supports_remove(self.vector_store.index):
+                    self.vector_store.delete(ids)
+                else:
+                    # HNSW cannot remove vectors; rebuild it without them
+                    kind = index_kind(self.vector_store.index)
+                    spec = self.spec if self.spec.kind == kind else IndexSpec(kind)
+                    self._rebuild_locked(spec, exclude=set(ids))
+
+    # ---------------- Index type ----------------
+    def rebuild(self, spec: Optional[IndexSpec] = None) -> None:
+        """Rebuilds the index with `spec` (default: the current spec) and snapshots it."""
+        with self._lock:
+            if spec is not None:
+                self.spec = self.requested_spec = spec
+            if self.vector_store is not None:
+                self._rebuild_locked(self.spec)
+            os.makedirs(self.folder, exist_ok=True)
+            self._write_snapshot_locked()
+
+    def _maybe_rebuild_locked(self) -> bool:
+        if self.vector_store is None or not self.spec.wants_rebuild(self.vector_store.index, self.trained_on):
+            return False
+        print(f"[DOCS] Rebuilding index as {self.spec} ({self.vector_store.index.ntotal} chunks)...")
+        self._rebuild_locked(self.spec)
+        os.makedirs(self.folder, exist_ok=True)
+        self._write_snapshot_locked()
+        return True
+
+    def _rebuild_locked(self, spec: IndexSpec, exclude: Optional[set] = None) -> None:
+        store = self.vector_store
+        ids = [
+            store.index_to_docstore_id[i]
+            for i in range(store.index.ntotal)
+            if not exclude or store.index_to_docstore_id[i] not in exclude
+        ]
+        if not ids:
+            self.vector_store = None
+            return
+        docs = [store.docstore.search(doc_id) for doc_id in ids]
+
+        if index_kind(store.index) in ("flat", "hnsw") and not exclude:
+            vectors = store.index.reconstruct_n(0, store.index.ntotal)
+        else:
+            # Lossy (PQ) or filtered: re-embed, which is served by the embedding cache
+            vectors = np.asarray(self.embeddings.embed_documents([d.page_content for d in docs]), dtype=np.float32)
+
+        self.vector_store = FAISS(
+            embedding_function=self.embeddings,
+            index=build_faiss_index(spec, vectors.reshape(len(ids), -1)),
+            docstore=InMemoryDocstore(dict(zip(ids, docs))),
+            index_to_docstore_id=dict(enumerate(ids)),
+        )
+        self.trained_on = len(ids)
+        # Any in-flight compaction copied the old index
+        self._generation += 1
+
+    # ---------------- Persistence ----------------
+    def commit(self) -> None:
+        """Persists everything added or deleted since the last commit."""
+        with self._lock:
+            os.makedirs(self.folder, exist_ok=True)
+            if self._reset_pending or not self.incremental:
+                if not self._maybe_rebuild_locked():
+                    self._write_snapshot_locked()
+                return
+            if not self._pending:
+                return
+
+            segment = f"seg-{self.next_seq:06d}.pkl"
+            atomic_write_pickle(os.path.join(self.folder, segment), self._pending)
+            self.segments.append(segment)
+            self.next_seq += 1
+            self._write_manifest()
+            self._pending = []
+
+            if self._maybe_rebuild_locked():
+                return
+            if len(self.segments) >= self.compact_after:
+                self._start_compaction()
+
+    def _write_snapshot_locked(self) -> None:
+        old_files = self._current_files()
+        if self.vector_store is not None:
+            name = f"snapshot-{self.next_seq:06d}"
+            self.vector_store.save_local(self.folder, index_name=name)
+            self.base = name
+        else:
+            self.base = None
+        self.next_seq += 1
+        self.segments = []
+        self._write_manifest()
+        self._pending = []
+        self._reset_pending = False
+        self._remove_files(old_files - self._current_files())
+
+    def _current_files(self) -> set:
+        files = set(self.segments)
+        if self.base:
+            files.update({f"{self.base}.faiss", f"{self.base}.pkl"})
+        return files
+
+    def _remove_files(self, names) -> None:
+        for name in names:
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+    def _start_compaction(self) -> None:
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self._compact, name="faiss-compactor", daemon=True)
+        self._compactor.start()
+
+    def _compact(self) -> None:
+        """Folds the current segments into a new base snapshot."""
+        try:
+            with self._lock:
+                if self.vector_store is None or not self.segments or self._pending:
+                    # Uncommitted ops would end up in both the snapshot and a later segment
+                    return
+                # Copy the in-memory store so ingestion is not blocked while writing
+                payload = self.vector_store.serialize_to_bytes()
+                covered = list(self.segments)
+                generation = self._generation
+                name = f"snapshot-{self.next_seq:06d}"
+                self.next_seq += 1
+
+            snapshot = FAISS.deserialize_from_bytes(payload, self.embeddings, allow_dangerous_deserialization=True)
+            snapshot.save_local(self.folder, index_name=name)
+
+            with self._lock:
+                if generation != self._generation:
+                    # A reset happened meanwhile; this snapshot is stale
+                    self._remove_files({f"{name}.faiss", f"{name}.pkl"})
+                    return
+                old_files = self._current_files()
+                self.base = name
+                self.segments = [s for s in self.segments if s not in covered]
+                self._write_manifest()
+                self._remove_files(old_files - self._current_files())
+            print(f"[DOCS] Compacted {len(covered)} index segment(s) into {name}")
+        except Exception as e:
+            print(f"[WARNING] Index compaction failed: {e}")
+
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> None:
+        if self._compactor is not None:
+            self._compactor.join(timeout)
@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+import tempfile
+from typing import List, Optional, Dict, Any
+
+
+def hash_bytes(data: bytes) -> str:
+    """Returns the SHA-256 hex digest of raw file bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def atomic_write_json(path: str, payload: Any) -> None:
+    """Writes JSON to a temp file next to `path` and renames it into place."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class IngestionManifest:
+    """
+    Persistent record of which documents are already in the vector index.
+
+    Each entry is keyed by file name and stores the content hash, mtime,
+    size, chunker version and the ids of the chunks that file produced, so
+    unchanged files can be skipped and changed files can have their old
+    chunks replaced.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            self.entries = {}
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+        except Exception as e:
+            print(f"[WARNING] Could not read ingestion manifest, starting fresh: {e}")
+            self.entries = {}
+
+    def save(self) -> None:
+        atomic_write_json(self.path, {"files": self.entries})
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def clear(self) -> None:
+        self.entries = {}
+
+    def get(self, file_name: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(file_name)
+
+    def is_unchanged(self, file_name: str, mtime: float, size: int, chunker_version: str) -> bool:
+        """Cheap check on mtime/size that avoids reading the file at all."""
+        entry = self.entries.get(file_name)
+        return bool(
+            entry
+            and entry.get("chunker_version") == chunker_version
+            and entry.get("mtime") == mtime
+            and entry.get("size") == size
+        )
+
+    def has_content(self, file_name: str, sha256: str, chunker_version: str) -> bool:
+        """True if the file's content was already indexed with this chunker."""
+        entry = self.entries.get(file_name)
+        return bool(
+            entry
+            and entry.get("chunker_version") == chunker_version
+            and entry.get("sha256") == sha256
+        )
+
+    def touch(self, file_name: str, mtime: float, size: int) -> None:
+        """Refreshes mtime/size for a file whose content did not change."""
+        entry = self.entries.get(file_name)
+        if entry:
+            entry["mtime"] = mtime
+            entry["size"] = size
+
+    def record(
+        self,
+        file_name: str,
+        sha256: str,
+        mtime: float,
+        size: int,
+        chunker_version: str,
+        chunk_ids: List[str],
+        **extra: Any,
+    ) -> None:
+        self.entries[file_name] = {
+            "sha256": sha256,
+            "mtime": mtime,
+            "size": size,
+            "chunker_version": chunker_version,
+            "chunk_ids": list(chunk_ids),
+            **extra,
+        }
+
+    def remove(self, file_name: str) -> Optional[Dict[str, Any]]:
+        return self.entries.pop(file_name, None)
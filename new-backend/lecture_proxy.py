@@ -0,0 +1,121 @@
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from http_clients import async_http_client, async_request
+
+
+class ProxiedResponse:
+    """Buffered upstream response, shared between cache hits and coalesced callers."""
+
+    def __init__(self, status_code: int, body: bytes, content_type: str, upstream_etag: Optional[str] = None):
+        self.status_code = status_code
+        self.body = body
+        self.content_type = content_type
+        self.upstream_etag = upstream_etag
+        # Our own validator, so clients can revalidate even if upstream sends no ETag
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.fetched_at = time.monotonic()
+
+    @classmethod
+    def from_httpx(cls, response: httpx.Response) -> "ProxiedResponse":
+        return cls(
+            response.status_code,
+            response.content,
+            response.headers.get("content-type", "application/json"),
+            response.headers.get("etag"),
+        )
+
+
+class LectureProxy:
+    """
+    Async proxy to the Node lecture service at `base_url`.
+
+    - GETs are cached per path. Within `fresh_for` seconds the cached body
+      is served as is; after that it is revalidated upstream with
+      If-None-Match when upstream gave an ETag, so an unchanged list costs
+      a 304. Clients get our own ETag and a 304 when theirs still matches.
+    - Identical concurrent POSTs (same path and JSON body, e.g. quiz
+      generation for one lecture) share a single upstream call.
+    - Other POSTs can be streamed straight through with `open_stream`.
+    """
+
+    def __init__(self, base_url: str, fresh_for: float = 5.0, max_entries: int = 256):
+        self.base_url = base_url.rstrip("/")
+        self.fresh_for = fresh_for
+        self.max_entries = max_entries
+        self._cache: Dict[str, ProxiedResponse] = {}
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.stats_counters = {"hits": 0, "revalidated": 0, "misses": 0, "coalesced": 0}
+
+    # ---------------- Cached GET ----------------
+    async def get(self, path: str, timeout: float = 20) -> ProxiedResponse:
+        cached = self._cache.get(path)
+        if cached and time.monotonic() - cached.fetched_at < self.fresh_for:
+            self.stats_counters["hits"] += 1
+            return cached
+
+        headers = {}
+        if cached and cached.upstream_etag:
+            headers["If-None-Match"] = cached.upstream_etag
+        response = await self._coalesced(
+            "GET", path, "", lambda: async_request("GET", self.base_url + path, headers=headers, timeout=timeout)
+        )
+
+        if response.status_code == 304 and cached:
+            self.stats_counters["revalidated"] += 1
+            cached.fetched_at = time.monotonic()
+            return cached
+
+        self.stats_counters["misses"] += 1
+        if response.status_code == 200:
+            self._store(path, response)
+        return response
+
+    def _store(self, path: str, response: ProxiedResponse) -> None:
+        self._cache.pop(path, None)
+        self._cache[path] = response
+        while len(self._cache) > self.max_entries:
+            self._cache.pop(next(iter(self._cache)))
+
+    def invalidate(self, prefix: str = "") -> None:
+        for path in [p for p in self._cache if p.startswith(prefix)]:
+            del self._cache[path]
+
+    # ---------------- POST ----------------
+    async def post_coalesced(self, path: str, payload: Any, timeout: float = 60) -> ProxiedResponse:
+        """POSTs `payload`; concurrent calls with the same path and payload share one upstream request."""
+        body_key = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return await self._coalesced(
+            "POST", path, body_key,
+            lambda: async_request("POST", self.base_url + path, json=payload, timeout=timeout),
+        )
+
+    async def open_stream(self, method: str, path: str, timeout: float = 60, **kwargs) -> httpx.Response:
+        """Sends a request and returns the response unread, for streaming to the client. Caller must aclose()."""
+        client = async_http_client()
+        request = client.build_request(method, self.base_url + path, timeout=timeout, **kwargs)
+        return await client.send(request, stream=True)
+
+    async def _coalesced(self, method: str, path: str, body_key: str, send) -> ProxiedResponse:
+        key = (f"{method} {path}", body_key)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(send))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.stats_counters["coalesced"] += 1
+        # shield: one caller disconnecting must not cancel the shared request
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _fetch(send) -> ProxiedResponse:
+        return ProxiedResponse.from_httpx(await send())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._cache), **self.stats_counters}
@@ -4,101 +4,87 @@ import tempfile
 import re
 import time
 import shutil
-from typing import List, Optional, Dict, Any
+import threading
+from typing import List, Optional, Dict, Any, Iterator
 from dotenv import load_dotenv
 
-# Document Processing Imports
-import pypdf
-import docx2txt
-from pptx import Presentation
-
 # LangChain / AI Imports
 from langchain_groq import ChatGroq
 from langchain_core.documents import Document
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
+
+from document_loader import (
+    SUPPORTED_EXTENSIONS,
+    DEFAULT_PAGES_PER_TASK,
+    extract_text_from_pdf,
+    extract_text_from_docx,
+    extract_text_from_pptx,
+    extract_text_from_txt,
+    classify_subject,
+    load_document_from_path,
+    iter_extracted_documents,
+)
+from ingest_manifest import IngestionManifest, hash_bytes
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from index_store import IndexStore
+from ann_index import IndexSpec
+from bm25_index import BM25Index
+from ttl_cache import TTLCache
+from answer_cache import SemanticAnswerCache
+from config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_DTYPE,
+    INDEX_PERSISTENCE,
+    INDEX_COMPACT_AFTER_SEGMENTS,
+    INDEX_SPEC,
+    RETRIEVAL_MODE,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL,
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL,
+)
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extracts text from a PDF file."""
-    try:
-        reader = pypdf.PdfReader(file_path)
-        pages = [page.extract_text() or "" for page in reader.pages]
-        return "\n".join(pages)
-    except Exception as e:
-        print(f"[ERROR] PDF Extraction failed: {e}")
-        return ""
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
+# One vector index shard per subject, matching classify_subject()
+SUBJECT_SHARDS = ("math", "reading", "general")
 
-def extract_text_from_docx(file_path: str) -> str:
-    """Extracts text from a DOCX file."""
-    try:
-        return docx2txt.process(file_path)
-    except Exception as e:
-        print(f"[ERROR] DOCX Extraction failed: {e}")
-        return ""
-
-
-def extract_text_from_pptx(file_path: str) -> str:
-    """Extracts text from a PPTX file."""
-    try:
-        prs = Presentation(file_path)
-        lines = []
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text:
-                    lines.append(shape.text)
-        return "\n".join(lines)
-    except Exception as e:
-        print(f"[ERROR] PPTX Extraction failed: {e}")
-        return ""
-
-
-def extract_text_from_txt(file_path: str) -> str:
-    """Extracts text from a plain text file."""
-    try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
-    except Exception as e:
-        print(f"[ERROR] TXT Extraction failed: {e}")
-        return ""
+# Reciprocal-rank fusion constant used by hybrid retrieval
+RRF_K = 60
 
+# Numbers in a question are part of the answer-cache scope: "five plus three"
+# and "five plus four" embed almost identically but need different answers
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20,
+    "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+    "hundred": 100, "thousand": 1000, "half": 0.5, "double": 2, "twice": 2,
+    "பூஜ்யம்": 0, "சூன்யம்": 0, "ஒன்று": 1, "ஒரு": 1, "இரண்டு": 2, "மூன்று": 3, "நான்கு": 4,
+    "ஐந்து": 5, "ஆறு": 6, "ஏழு": 7, "எட்டு": 8, "ஒன்பது": 9, "பத்து": 10,
+}
 
-def load_document_from_path(file_path: str) -> List[Dict[str, Any]]:
-    """Determines file type and extracts text accordingly."""
-    ext = os.path.splitext(file_path)[1].lower()
-    docs = []
-    filename = os.path.basename(file_path)
-    content = ""
 
-    try:
-        if ext == ".pdf":
-            content = extract_text_from_pdf(file_path)
-        elif ext == ".docx":
-            content = extract_text_from_docx(file_path)
-        elif ext == ".pptx":
-            content = extract_text_from_pptx(file_path)
-        elif ext == ".txt":
-            content = extract_text_from_txt(file_path)
-        else:
-            return docs
+def question_numbers(question: str) -> tuple:
+    """Digits and number words in `question`, in order ("five plus 3" -> ("5", "3"))."""
+    numbers = []
+    for token in re.findall(r"\d+(?:\.\d+)?|[^\s\d.,!?;:+\-*/=()\"']+", question.lower()):
+        if token[0].isdigit():
+            numbers.append(token)
+        elif token in NUMBER_WORDS:
+            numbers.append(str(NUMBER_WORDS[token]))
+    return tuple(numbers)
 
-        if content.strip():
-            docs.append({
-                "content": content,
-                "filename": filename,
-                # Basic classification based on filename
-                "subject": "math" if "aejm" in filename.lower()
-                else "reading" if "aemr" in filename.lower()
-                else "general"
-            })
-    except Exception as e:
-        print(f"[ERROR] Loading document failed: {e}")
 
-    return docs
+# Bump whenever smart_chunk_documents changes how text is split, so that
+# already-ingested files get re-chunked on the next startup.
+CHUNKER_VERSION = "1"
 
 
 def smart_chunk_documents(documents: List[Dict[str, Any]]) -> List[Document]:
@@ -153,18 +139,50 @@ def smart_chunk_documents(documents: List[Dict[str, Any]]) -> List[Document]:
 
 
 class RAGSystem:
-    def __init__(self, doc_folder: str = "./docs", index_folder: str = "./indexes"):
+    def __init__(
+        self,
+        doc_folder: str = "./docs",
+        index_folder: str = "./indexes",
+        index_spec: Optional[Any] = None,
+    ):
         self.doc_folder = doc_folder
         self.index_folder = index_folder
+        # "flat", "hnsw", "ivf_flat" or "ivf_pq" with optional params, e.g. "ivf_pq:nlist=256,m=16".
+        # None keeps whatever the saved index was built with.
+        index_spec = index_spec or INDEX_SPEC or None
+        self.index_spec: Optional[IndexSpec] = (
+            IndexSpec.parse(index_spec) if isinstance(index_spec, str) else index_spec
+        )
         self.faiss_index_path = os.path.join(self.index_folder, "faiss_index")
+        self.manifest_path = os.path.join(self.index_folder, "ingest_manifest.json")
+        self.bm25_index_path = os.path.join(self.index_folder, "bm25_index.json.gz")
+        self.embedding_cache_dir = os.path.join(self.index_folder, "embedding_cache")
+        self.answer_cache_path = os.path.join(self.index_folder, "answer_cache.pkl")
 
         self.conversation_history = []
         self.current_subject = None
         self.learning_progress = {}
+        # query() runs on several LLM workers at once; turns and subject change under this lock
+        self._conversation_lock = threading.RLock()
+
+        # Normalized query -> embedding, and (query, subject, k, mode) -> chunk ids.
+        # Retrieval results are dropped whenever index_version changes.
+        self.index_version = 0
+        self.query_embedding_cache = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+        self.retrieval_cache = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
 
         os.makedirs(self.doc_folder, exist_ok=True)
         os.makedirs(self.index_folder, exist_ok=True)
 
+        self.answer_cache: Optional[SemanticAnswerCache] = None
+        if ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(
+                self.answer_cache_path,
+                maxsize=ANSWER_CACHE_SIZE,
+                ttl=ANSWER_CACHE_TTL,
+                threshold=ANSWER_CACHE_THRESHOLD,
+            )
+
         self.embeddings, self.embeddings_available = self._load_embeddings_with_retry()
 
         groq_api_key = os.getenv("GROQ_API_KEY")
@@ -188,24 +206,121 @@ class RAGSystem:
             print(f"[ERROR] Failed to initialize GROQ LLM: {str(e)}")
             self.llm = None
 
-        self.vector_store: Optional[FAISS] = None
-
-        if self.embeddings_available and os.path.exists(self.faiss_index_path):
+        # Subject -> IndexStore; empty until the embeddings model is available
+        self.index_stores: Dict[str, IndexStore] = {}
+        # Lexical index over the same chunks; works without embeddings
+        self.bm25 = BM25Index(self.bm25_index_path)
+
+        index_loaded = False
+        if self.embeddings_available:
+            index_loaded = self._load_index_stores()
+            if self.get_document_count() > 0:
+                counts = ", ".join(f"{s}: {self._shard_count(s)}" for s in SUBJECT_SHARDS)
+                print(f"[DOCS] Loaded existing index with {self.get_document_count()} chunks ({counts}).")
+            else:
+                print("[DOCS] Ready for document ingestion...")
+        else:
+            print("[DOCS] Running in offline mode - limited functionality available")
+
+        self.manifest = IngestionManifest(self.manifest_path)
+        if self.get_document_count() > 0 and not self.manifest.exists():
+            # Index predates the manifest: its chunks cannot be attributed to
+            # files, so re-ingesting would only pile duplicates on top of it.
+            print("[DOCS] Existing index has no ingestion manifest; it will be rebuilt from documents.")
+            self._reset_index_stores()
+        elif self.embeddings_available and self.manifest.entries and (
+            not index_loaded or (self.get_document_count() == 0 and any(
+                e.get("chunk_ids") for e in self.manifest.entries.values()
+            ))
+        ):
+            print("[DOCS] Ingestion manifest has no matching index; documents will be re-ingested.")
+            self.manifest.clear()
+            self.bm25.clear()
+        elif self.get_document_count() > 0 and not self.bm25.exists():
+            self._backfill_bm25()
+
+    def _load_index_stores(self) -> bool:
+        self._remove_unsharded_index()
+        loaded = True
+        self.index_stores = {}
+        for subject in SUBJECT_SHARDS:
+            store = IndexStore(
+                os.path.join(self.faiss_index_path, subject),
+                self.embeddings,
+                incremental=INDEX_PERSISTENCE == "incremental",
+                compact_after=INDEX_COMPACT_AFTER_SEGMENTS,
+                spec=self.index_spec,
+            )
             try:
-                self.vector_store = FAISS.load_local(
-                    self.faiss_index_path,
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
-                )
-                print(f"[DOCS] Loaded existing index with {self.vector_store.index.ntotal} chunks.")
+                store.load()
             except Exception as e:
-                print(f"[WARNING] Failed to load existing index: {e}")
-                self.vector_store = None
-        else:
-            if self.embeddings_available:
-                print("[DOCS] Ready for document ingestion...")
-            else:
-                print("[DOCS] Running in offline mode - limited functionality available")
+                print(f"[WARNING] Failed to load existing {subject} index: {e}")
+                store.reset()
+                loaded = False
+            self.index_stores[subject] = store
+        return loaded
+
+    def _remove_unsharded_index(self) -> None:
+        """
+        Deletes a single, unsharded index left at the top of faiss_index.
+        Its documents get re-ingested into subject shards (vectors come
+        from the embedding cache).
+        """
+        if not os.path.isdir(self.faiss_index_path):
+            return
+        stale = [
+            name for name in os.listdir(self.faiss_index_path)
+            if os.path.isfile(os.path.join(self.faiss_index_path, name))
+            and re.match(r"^(store\.json|index\.(faiss|pkl)|snapshot-\d+\.(faiss|pkl)|seg-\d+\.pkl)$", name)
+        ]
+        if stale:
+            print("[DOCS] Found an unsharded index; documents will be re-ingested into subject shards.")
+            for name in stale:
+                os.remove(os.path.join(self.faiss_index_path, name))
+
+    def _reset_index_stores(self) -> None:
+        for store in self.index_stores.values():
+            store.reset()
+        self.bm25.clear()
+        self._bump_index_version()
+
+    def _commit_index_stores(self) -> None:
+        for store in self.index_stores.values():
+            store.commit()
+        self.bm25.save()
+        self._bump_index_version()
+
+    def _bump_index_version(self) -> None:
+        """Marks the indexed content as changed, invalidating cached retrievals."""
+        self.index_version += 1
+        self.retrieval_cache.clear()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            "index_version": self.index_version,
+            "query_embeddings": self.query_embedding_cache.stats(),
+            "retrieval": self.retrieval_cache.stats(),
+            "answers": self.answer_cache.stats() if self.answer_cache is not None else None,
+        }
+
+    def _backfill_bm25(self) -> None:
+        """Builds the lexical index from the vector stores' docstores."""
+        print("[DOCS] Building BM25 index from the existing vector index...")
+        for store in self.index_stores.values():
+            if store.vector_store is None:
+                continue
+            ids = list(store.vector_store.index_to_docstore_id.values())
+            self.bm25.add_documents([store.vector_store.docstore.search(i) for i in ids], ids)
+        self.bm25.save()
+
+    def _searchable_count(self) -> int:
+        """Chunks reachable by any retrieval path (lexical works offline)."""
+        vector_count = self.get_document_count() if self.embeddings_available else 0
+        return max(vector_count, len(self.bm25))
+
+    def _shard_count(self, subject: str) -> int:
+        store = self.index_stores.get(subject)
+        return store.vector_store.index.ntotal if store and store.vector_store else 0
 
     def _language_display_name(self, language: Optional[str]) -> str:
         mapping = {"en": "English", "ta": "Tamil"}
@@ -269,7 +384,7 @@ class RAGSystem:
 
     def _load_embeddings_with_retry(self, max_retries=3) -> tuple:
         """Load embeddings with retry mechanism and cache clearing."""
-        model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        model_name = EMBEDDING_MODEL_NAME
 
         for attempt in range(max_retries):
             try:
@@ -280,11 +395,18 @@ class RAGSystem:
                     self._clear_model_cache(model_name)
                     time.sleep(2)  # Brief delay before retry
 
-                embeddings = HuggingFaceEmbeddings(
+                encoder = HuggingFaceEmbeddings(
                     model_name=model_name,
                     model_kwargs={"device": "cpu"},
-                    encode_kwargs={"normalize_embeddings": True}
+                    encode_kwargs={"normalize_embeddings": True, "batch_size": EMBEDDING_BATCH_SIZE}
                 )
+                cache = EmbeddingCache(
+                    self.embedding_cache_dir,
+                    model_name=model_name,
+                    normalize=True,
+                    dtype=EMBEDDING_CACHE_DTYPE,
+                )
+                embeddings = CachedEmbeddings(encoder, cache, batch_size=EMBEDDING_BATCH_SIZE)
 
                 print("[SUCCESS] Embeddings model loaded successfully")
                 return embeddings, True
@@ -324,23 +446,17 @@ class RAGSystem:
         """Manual retry method for embeddings loading."""
         print("[INFO] Manually retrying embeddings loading...]")
         self.embeddings, self.embeddings_available = self._load_embeddings_with_retry()
+        self.query_embedding_cache.clear()
+        self._bump_index_version()
 
         # Try to reload vector store if embeddings are now available
-        if self.embeddings_available and os.path.exists(self.faiss_index_path):
-            try:
-                self.vector_store = FAISS.load_local(
-                    self.faiss_index_path,
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
-                )
-                print("[SUCCESS] Vector store reloaded successfully")
-            except Exception as e:
-                print(f"[WARNING] Failed to reload vector store: {e}")
+        if self.embeddings_available and self._load_index_stores() and self.get_document_count() > 0:
+            print("[SUCCESS] Vector store reloaded successfully")
 
         return self.embeddings_available
 
     def get_document_count(self) -> int:
-        return self.vector_store.index.ntotal if self.vector_store else 0
+        return sum(self._shard_count(subject) for subject in self.index_stores)
 
     def detect_subject_and_intent(self, question: str) -> Dict[str, str]:
         """
@@ -391,7 +507,7 @@ class RAGSystem:
         only on the model + prompts. This avoids pulling in unrelated
         Tamil textbook passages.
         """
-        if not self.embeddings_available or not self.vector_store:
+        if self._searchable_count() == 0:
             return False
 
         # If the question contains Tamil script, do not use RAG.
@@ -400,10 +516,10 @@ class RAGSystem:
 
         analysis = self.detect_subject_and_intent(question)
 
-        if self.vector_store and self.get_document_count() > 0:
+        if self._searchable_count() > 0:
             if analysis["intent"] in ["learn", "explore", "practice"]:
                 return True
-            if analysis["subject"] in ["math", "reading"] and self.vector_store:
+            if analysis["subject"] in ["math", "reading"]:
                 return True
 
         greetings = ["hello", "hi", "thanks", "bye", "good morning", "how are you"]
@@ -413,7 +529,7 @@ class RAGSystem:
         if re.search(r'\d+\s*[+\-*/]\s*\d+', question):
             return False
 
-        return self.vector_store is not None and self.get_document_count() > 0
+        return self._searchable_count() > 0
 
     def evaluate_simple_math(self, question: str, target_language: str = "en") -> Optional[str]:
         """
@@ -530,38 +646,129 @@ class RAGSystem:
         return None
 
     def get_conversation_context(self) -> str:
-        if len(self.conversation_history) <= 1:
-            return ""
+        with self._conversation_lock:
+            if len(self.conversation_history) <= 1:
+                return ""
+
+            recent_history = self.conversation_history[-20:]
+            history_text = "\n".join([
+                f"{'Student' if msg['role'] == 'user' else 'Teacher'}: {msg['content']}"
+                for msg in recent_history[:-1]
+            ])
 
-        recent_history = self.conversation_history[-20:]
-        history_text = "\n".join([
-            f"{'Student' if msg['role'] == 'user' else 'Teacher'}: {msg['content']}"
-            for msg in recent_history[:-1]
-        ])
+            context = f"\nRecent conversation:\n{history_text}\n"
 
-        context = f"\nRecent conversation:\n{history_text}\n"
+            if self.current_subject:
+                context += f"\nCurrent subject focus: {self.current_subject}\n"
 
-        if self.current_subject:
-            context += f"\nCurrent subject focus: {self.current_subject}\n"
+            return context
 
-        return context
+    def get_relevant_context(
+        self,
+        question: str,
+        subject: str,
+        top_k: int = 5,
+        mode: Optional[str] = None,
+    ) -> List[Document]:
+        """
+        Retrieves chunks for a question.
 
-    def get_relevant_context(self, question: str, subject: str, top_k: int = 5) -> List[Document]:
-        if not self.vector_store:
-            return []
+        mode "vector" searches only the shard for `subject` ("general", or an
+        empty subject shard, searches every shard and merges by distance).
+        mode "bm25" uses the lexical index. mode "hybrid" fuses both rankings
+        with reciprocal-rank fusion. Without embeddings every mode falls back
+        to BM25.
+        """
+        mode = (mode or RETRIEVAL_MODE).lower()
+        normalized = self._normalize_query(question)
+        cache_key = (normalized, subject, top_k, mode)
+        cached_ids = self.retrieval_cache.get(cache_key)
+        if cached_ids is not None:
+            docs = self._documents_by_id(cached_ids)
+            if len(docs) == len(cached_ids):
+                return docs
+
+        docs = self._retrieve(normalized, subject, top_k, mode)
+        if all(doc.id for doc in docs):
+            self.retrieval_cache.put(cache_key, [doc.id for doc in docs])
+        return docs
+
+    def _normalize_query(self, question: str) -> str:
+        return re.sub(r"\s+", " ", question.strip().lower())
+
+    def _embed_query_cached(self, normalized_query: str) -> List[float]:
+        vector = self.query_embedding_cache.get(normalized_query)
+        if vector is None:
+            vector = self.embeddings.embed_query(normalized_query)
+            self.query_embedding_cache.put(normalized_query, vector)
+        return vector
+
+    def _documents_by_id(self, ids: List[str]) -> List[Document]:
+        docs = []
+        for chunk_id in ids:
+            doc = None
+            for store in self.index_stores.values():
+                if store.vector_store is not None:
+                    found = store.vector_store.docstore.search(chunk_id)
+                    if isinstance(found, Document):
+                        doc = found
+                        break
+            if doc is None and chunk_id in self.bm25.docs:
+                entry = self.bm25.docs[chunk_id]
+                doc = Document(id=chunk_id, page_content=entry["text"], metadata=dict(entry["metadata"]))
+            if doc is not None:
+                docs.append(doc)
+        return docs
+
+    def _retrieve(self, question: str, subject: str, top_k: int, mode: str) -> List[Document]:
+        vector_ready = self.embeddings_available and self.get_document_count() > 0
+        if not vector_ready or mode == "bm25":
+            return self._lexical_search(question, subject, top_k)
 
         try:
-            all_docs = self.vector_store.similarity_search(question, k=top_k * 2)
+            query_vector = self._embed_query_cached(question)
+            if subject != "general" and self._shard_count(subject) > 0:
+                subjects = [subject]
+            else:
+                subjects = list(self.index_stores)
 
-            if subject != "general":
-                filtered_docs = [doc for doc in all_docs if doc.metadata.get("subject") == subject]
-                if filtered_docs:
-                    return filtered_docs[:top_k]
+            if mode != "hybrid":
+                return self._search_shards(subjects, query_vector, top_k)
 
-            return all_docs[:top_k]
+            # Fuse deeper candidate lists so either ranking can promote a chunk
+            depth = max(top_k * 2, 10)
+            vector_docs = self._search_shards(subjects, query_vector, depth)
+            lexical_docs = self._lexical_search(question, subject, depth)
+            return self._reciprocal_rank_fusion([vector_docs, lexical_docs], top_k)
         except Exception as e:
             print(f"[WARNING] Similarity search failed: {e}")
-            return []
+            return self._lexical_search(question, subject, top_k)
+
+    def _lexical_search(self, question: str, subject: str, top_k: int) -> List[Document]:
+        subject_filter = subject if subject != "general" and self.bm25.has_subject(subject) else None
+        return [doc for doc, _ in self.bm25.search(question, k=top_k, subject=subject_filter)]
+
+    def _reciprocal_rank_fusion(self, rankings: List[List[Document]], top_k: int) -> List[Document]:
+        scores: Dict[str, float] = {}
+        docs: Dict[str, Document] = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking):
+                key = doc.id or doc.page_content
+                scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+                docs.setdefault(key, doc)
+        best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [docs[key] for key in best]
+
+    def _search_shards(self, subjects: List[str], query_vector: List[float], top_k: int) -> List[Document]:
+        scored = []
+        for subject in subjects:
+            if self._shard_count(subject) == 0:
+                continue
+            store = self.index_stores[subject].vector_store
+            scored.extend(store.similarity_search_with_score_by_vector(query_vector, k=top_k))
+        # FAISS returns L2 distances: smaller is closer
+        scored.sort(key=lambda pair: pair[1])
+        return [doc for doc, _ in scored[:top_k]]
 
     def create_educational_prompt(
         self,
@@ -569,8 +776,10 @@ class RAGSystem:
         context_docs: List[Document],
         analysis: Dict[str, str],
         target_language: str = "en",
+        conversation_context: Optional[str] = None,
     ) -> str:
-        conversation_context = self.get_conversation_context()
+        if conversation_context is None:
+            conversation_context = self.get_conversation_context()
         language_instruction = self._build_language_instruction(target_language)
 
         docs_formatted = ""
@@ -691,65 +900,218 @@ Respond only in clean, plain text suitable for text-to-speech systems.
 
         return prompt
 
-    def ingest_file(self, file_name: str, file_bytes: bytes) -> str:
+    def ingest_path(self, file_path: str) -> str:
+        """
+        Ingests a document from disk, skipping it when the manifest shows it
+        is already indexed. Unchanged files are detected from mtime/size
+        without reading them.
+        """
+        file_name = os.path.basename(file_path)
+        if self._is_path_unchanged(file_path):
+            return f"'{file_name}' is already indexed."
+
+        with open(file_path, "rb") as f:
+            file_bytes = f.read()
+
+        return self.ingest_file(file_name, file_bytes, store_copy=not self._in_doc_folder(file_path))
+
+    def ingest_paths(
+        self,
+        file_paths: List[str],
+        max_workers: Optional[int] = None,
+        pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+    ) -> List[str]:
+        """
+        Bulk ingestion entry point. Text extraction is fanned out across a
+        process pool (per file, and per page range for large PDFs) and the
+        results are chunked and indexed in input order as they arrive. The
+        index and manifest are saved once at the end.
+        """
+        messages = []
+        pending: Dict[str, tuple] = {}
+        for file_path in file_paths:
+            file_name = os.path.basename(file_path)
+            if os.path.splitext(file_name)[1].lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            if self._is_path_unchanged(file_path):
+                messages.append(f"'{file_name}' is already indexed.")
+                continue
+            with open(file_path, "rb") as f:
+                file_bytes = f.read()
+            file_hash = hash_bytes(file_bytes)
+            if self.index_stores and self.manifest.has_content(file_name, file_hash, CHUNKER_VERSION):
+                self._refresh_manifest_stat(file_name, file_path)
+                messages.append(f"'{file_name}' is already indexed.")
+                continue
+            pending[file_path] = (file_hash, file_bytes)
+
+        if not pending:
+            self.manifest.save()
+            return messages
+
         if not self.embeddings_available:
-            # Try to reload embeddings once
             print("[INFO] Embeddings not available, attempting to reload...]")
             if not self.retry_embeddings_loading():
-                return f"❗ Cannot ingest '{file_name}': Embeddings model not available. Check internet connection."
-
-        try:
-            suffix = os.path.splitext(file_name)[1]
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(file_bytes)
-                tmp_path = tmp.name
+                return messages + [
+                    f"❗ Cannot ingest '{os.path.basename(p)}': Embeddings model not available. Check internet connection."
+                    for p in pending
+                ]
+
+        changed = False
+        for file_path, raw_docs in iter_extracted_documents(list(pending), max_workers, pages_per_task):
+            file_name = os.path.basename(file_path)
+            file_hash, file_bytes = pending[file_path]
+            try:
+                chunks, chunk_ids, removed = self._replace_file_chunks(file_name, file_hash, raw_docs)
+                changed = True
+                if not self._in_doc_folder(file_path):
+                    self._store_document_copy(file_name, file_bytes)
+                self._record_manifest(file_name, file_hash, chunk_ids, len(file_bytes))
+                messages.append(self._ingest_message(file_name, raw_docs, chunks, removed))
+            except Exception as e:
+                messages.append(f"❗ Failed to ingest '{file_name}': {e}")
 
-            new_raw_docs = load_document_from_path(tmp_path)
+        if changed:
+            self._commit_index_stores()
+        self.manifest.save()
+        return messages
 
-            # Clean up temp file
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
+    def rebuild_index(self, max_workers: Optional[int] = None) -> List[str]:
+        """
+        Re-chunks and re-indexes every document in the docs folder from
+        scratch. Chunk vectors come from the embedding cache, so only chunks
+        whose text actually changed are sent to the encoder.
+        """
+        self._reset_index_stores()
+        self.manifest.clear()
+        file_paths = [
+            os.path.join(self.doc_folder, name)
+            for name in sorted(os.listdir(self.doc_folder))
+            if os.path.isfile(os.path.join(self.doc_folder, name))
+        ]
+        messages = self.ingest_paths(file_paths, max_workers=max_workers)
+        self._commit_index_stores()
+        return messages
+
+    def ingest_file(self, file_name: str, file_bytes: bytes, store_copy: bool = True) -> str:
+        file_hash = hash_bytes(file_bytes)
+
+        if self.index_stores and self.manifest.has_content(file_name, file_hash, CHUNKER_VERSION):
+            if store_copy:
+                self._store_document_copy(file_name, file_bytes)
+            self._refresh_manifest_stat(file_name, os.path.join(self.doc_folder, file_name))
+            self.manifest.save()
+            return f"'{file_name}' is already indexed."
 
-            if not new_raw_docs:
-                return f"'{file_name}' uploaded, but no content found."
+        if not self.embeddings_available:
+            # Try to reload embeddings once
+            print("[INFO] Embeddings not available, attempting to reload...]")
+            if not self.retry_embeddings_loading():
+                return f"❗ Cannot ingest '{file_name}': Embeddings model not available. Check internet connection."
 
-            new_chunks = smart_chunk_documents(new_raw_docs)
+        try:
+            # Keep the original file name so source/subject metadata is correct
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                tmp_path = os.path.join(tmp_dir, file_name)
+                with open(tmp_path, "wb") as tmp:
+                    tmp.write(file_bytes)
+                new_raw_docs = load_document_from_path(tmp_path)
 
-            if not new_chunks:
-                return f"'{file_name}' uploaded, but no chunks created."
+            new_chunks, chunk_ids, removed = self._replace_file_chunks(file_name, file_hash, new_raw_docs)
 
-            if self.vector_store is None:
-                self.vector_store = FAISS.from_documents(new_chunks, self.embeddings)
-            else:
-                self.vector_store.add_documents(new_chunks)
+            # Appends a segment (or writes a snapshot) atomically
+            self._commit_index_stores()
 
-            # Ensure index folder exists before saving
-            os.makedirs(self.index_folder, exist_ok=True)
-            self.vector_store.save_local(self.faiss_index_path)
+            if store_copy:
+                self._store_document_copy(file_name, file_bytes)
 
-            # Ensure docs folder exists
-            os.makedirs(self.doc_folder, exist_ok=True)
-            destination = os.path.join(self.doc_folder, file_name)
-            with open(destination, "wb") as f:
-                f.write(file_bytes)
+            self._record_manifest(file_name, file_hash, chunk_ids, len(file_bytes))
+            self.manifest.save()
 
-            return f"📥 '{file_name}' ingested. Added {len(new_chunks)} new chunk(s)."
+            return self._ingest_message(file_name, new_raw_docs, new_chunks, removed)
 
         except Exception as e:
             return f"❗ Failed to ingest '{file_name}': {e}"
 
+    def _replace_file_chunks(self, file_name: str, file_hash: str, raw_docs: List[Dict[str, Any]]) -> tuple:
+        """Chunks a file and swaps its previous chunks (if any) for the new ones."""
+        new_chunks = smart_chunk_documents(raw_docs) if raw_docs else []
+
+        # Drop chunks from a previous version of this file before adding new ones
+        previous = self.manifest.get(file_name)
+        removed = 0
+        if previous and previous.get("chunk_ids"):
+            old_subject = previous.get("subject") or classify_subject(file_name)
+            self.index_stores[old_subject].delete(previous["chunk_ids"])
+            self.bm25.delete(previous["chunk_ids"])
+            removed = len(previous["chunk_ids"])
+
+        # The file name is part of the id: two files with the same content must not collide in the docstore
+        name_hash = hash_bytes(file_name.encode("utf-8"))[:8]
+        chunk_ids = [f"{file_hash[:16]}-{name_hash}-{i}" for i in range(len(new_chunks))]
+        self.index_stores[classify_subject(file_name)].add_documents(new_chunks, chunk_ids)
+        self.bm25.add_documents(new_chunks, chunk_ids)
+
+        return new_chunks, chunk_ids, removed
+
+    def _ingest_message(self, file_name: str, raw_docs: list, chunks: list, removed: int) -> str:
+        if not raw_docs:
+            return f"'{file_name}' uploaded, but no content found."
+        if not chunks:
+            return f"'{file_name}' uploaded, but no chunks created."
+        if removed:
+            return f"📥 '{file_name}' re-ingested. Replaced {removed} old chunk(s) with {len(chunks)} new chunk(s)."
+        return f"📥 '{file_name}' ingested. Added {len(chunks)} new chunk(s)."
+
+    def _in_doc_folder(self, file_path: str) -> bool:
+        return os.path.abspath(os.path.dirname(file_path)) == os.path.abspath(self.doc_folder)
+
+    def _is_path_unchanged(self, file_path: str) -> bool:
+        stat = os.stat(file_path)
+        return bool(self.index_stores) and self.manifest.is_unchanged(
+            os.path.basename(file_path), stat.st_mtime, stat.st_size, CHUNKER_VERSION
+        )
+
+    def _store_document_copy(self, file_name: str, file_bytes: bytes) -> None:
+        # Ensure docs folder exists
+        os.makedirs(self.doc_folder, exist_ok=True)
+        with open(os.path.join(self.doc_folder, file_name), "wb") as f:
+            f.write(file_bytes)
+
+    def _refresh_manifest_stat(self, file_name: str, file_path: str) -> None:
+        if os.path.exists(file_path):
+            stat = os.stat(file_path)
+            self.manifest.touch(file_name, stat.st_mtime, stat.st_size)
+
+    def _record_manifest(self, file_name: str, file_hash: str, chunk_ids: List[str], size: int) -> None:
+        destination = os.path.join(self.doc_folder, file_name)
+        if os.path.exists(destination):
+            stat = os.stat(destination)
+            mtime, size = stat.st_mtime, stat.st_size
+        else:
+            mtime = None
+        self.manifest.record(
+            file_name, file_hash, mtime, size, CHUNKER_VERSION, chunk_ids,
+            subject=classify_subject(file_name),
+        )
+
     def clear_all_data(self) -> str:
-        self.vector_store = None
-        self.conversation_history = []
-        self.current_subject = None
+        self._reset_index_stores()
+        self.manifest.clear()
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+        with self._conversation_lock:
+            self.conversation_history = []
+            self.current_subject = None
         self.learning_progress = {}
 
         for folder in [self.doc_folder, self.index_folder]:
             if not os.path.exists(folder):
                 continue
             for path in glob.glob(os.path.join(folder, "*")):
+                # Cached chunk vectors hold no documents and are reused on re-ingest
+                if os.path.abspath(path) == os.path.abspath(self.embedding_cache_dir):
+                    continue
                 try:
                     if os.path.isfile(path) or os.path.islink(path):
                         os.remove(path)
@@ -760,22 +1122,31 @@ Respond only in clean, plain text suitable for text-to-speech systems.
 
         return "[CLEAR] Cache cleared. All documents, indexes, and conversation history removed."
 
-    def query(self, question: str, top_k: int = 5, target_language: str = "en") -> str:
+    def _prepare_query(self, question: str, top_k: int, target_language: str) -> Dict[str, Any]:
+        """
+        Everything query() does before calling the LLM. Returns {"answer", "record"}
+        when no LLM call is needed, otherwise the prompt and answer-cache keys.
+        """
         if not question:
-            return "Please type a question."
+            return {"answer": "Please type a question.", "record": False}
 
         question_clean = question.strip().lower()
         if question_clean in {"what", "why", "how", "where", "when", "ok", "yes", "no"}:
-            return "Could you tell me a bit more about what you want to know? I'm here to help you learn!"
-
-        self.conversation_history.append({"role": "user", "content": question})
+            return {
+                "answer": "Could you tell me a bit more about what you want to know? I'm here to help you learn!",
+                "record": False,
+            }
 
         analysis = self.detect_subject_and_intent(question)
 
-        if analysis["subject"] == "general" and self.current_subject:
-            analysis["subject"] = self.current_subject
-        else:
-            self.current_subject = analysis["subject"]
+        # One consistent snapshot of the conversation for this question's prompt
+        with self._conversation_lock:
+            self.conversation_history.append({"role": "user", "content": question})
+            if analysis["subject"] == "general" and self.current_subject:
+                analysis["subject"] = self.current_subject
+            else:
+                self.current_subject = analysis["subject"]
+            conversation_context = self.get_conversation_context()
 
         normalized_language = (target_language or "en").lower()
         if normalized_language not in {"en", "ta"}:
@@ -784,14 +1155,12 @@ Respond only in clean, plain text suitable for text-to-speech systems.
         # Try to handle simple math (both digit-based and Tamil word-based) BEFORE calling the LLM
         math_result = self.evaluate_simple_math(question, target_language=normalized_language)
         if math_result:
-            self.conversation_history.append({"role": "assistant", "content": math_result})
-            if len(self.conversation_history) > 24:
-                self.conversation_history = self.conversation_history[-24:]
-            return math_result
+            return {"answer": math_result, "record": True}
 
         use_rag = self.should_use_rag(question)
         is_tamil = self._contains_tamil(question)
 
+        context_docs: List[Document] = []
         if use_rag:
             context_docs = self.get_relevant_context(question, analysis["subject"], top_k)
             prompt = self.create_educational_prompt(
@@ -799,6 +1168,7 @@ Respond only in clean, plain text suitable for text-to-speech systems.
                 context_docs,
                 analysis,
                 target_language=normalized_language,
+                conversation_context=conversation_context,
             )
         else:
             language_instruction = self._build_language_instruction(normalized_language)
@@ -845,7 +1215,6 @@ STUDENT QUESTION (in Tamil):
 Now give your answer in Tamil, following ALL the rules above. Do not include any English. Do not include emojis or special symbols.
 """
             else:
-                conversation_context = self.get_conversation_context()
                 prompt = f"""You are a friendly, patient teacher for 1st and 2nd grade students.
 
 GENERAL BEHAVIOUR
@@ -886,31 +1255,153 @@ Respond only in clean, plain text suitable for text-to-speech systems.
 {language_instruction}
 """
 
-        if not self.llm:
-            answer = "[ERROR] Language model is not available. Please check your GROQ_API_KEY in the .env file and restart the application."
-        else:
+        # Near-duplicate questions answered from the same material reuse the stored answer
+        route = "rag" if use_rag else ("tamil" if is_tamil else "general")
+        answer_scope = (
+            normalized_language,
+            analysis["subject"],
+            route,
+            tuple(sorted(doc.id or "" for doc in context_docs)),
+            question_numbers(question),
+        )
+        question_vector = None
+        cached_answer = None
+        # Answers that depend on earlier turns ("why?", "explain that again") are neither reused nor stored
+        uses_conversation = bool(conversation_context) and route != "tamil"
+        if self.llm and self.answer_cache is not None and self.embeddings_available and not uses_conversation:
             try:
-                response = self.llm.invoke(prompt)
-                answer = response.content.strip()
+                question_vector = self._embed_query_cached(self._normalize_query(question))
+                cached_answer = self.answer_cache.get(answer_scope, question_vector)
             except Exception as e:
-                print(f"[WARNING] LLM Error: {e}")
-                if "401" in str(e) or "invalid" in str(e).lower():
-                    answer = "[ERROR] Invalid GROQ API key. Please check your GROQ_API_KEY in backend/.env file. Get a new key from the Groq console."
-                elif not self.embeddings_available:
-                    # Try to reload embeddings once per session
-                    if not hasattr(self, '_embeddings_retry_attempted'):
-                        self._embeddings_retry_attempted = True
-                        print("[INFO] Attempting to reload embeddings...]")
-                        if self.retry_embeddings_loading():
-                            return self.query(question, top_k, target_language=normalized_language)
-
-                    answer = "I'm running in offline mode right now. I can help with simple math problems like '5 + 3' or general conversations, but I cannot access educational documents. Check your internet connection and try restarting the application."
-                else:
-                    answer = f"I'm having trouble connecting to my language model right now: {e}. Please try again or check your API key."
+                print(f"[WARNING] Answer cache lookup failed: {e}")
+
+        if cached_answer:
+            answer, similarity = cached_answer
+            print(f"[CACHE] Reusing answer for similar question (similarity {similarity:.3f})")
+            return {"answer": answer, "record": True}
+        if not self.llm:
+            return {
+                "answer": "[ERROR] Language model is not available. Please check your GROQ_API_KEY in the .env file and restart the application.",
+                "record": True,
+            }
+        return {
+            "prompt": prompt,
+            "answer_scope": answer_scope,
+            "question_vector": question_vector,
+            "normalized_language": normalized_language,
+        }
+
+    def _record_answer(self, answer: str) -> None:
+        with self._conversation_lock:
+            self.conversation_history.append({"role": "assistant", "content": answer})
+            # Trimmed in place so a concurrent append is never lost
+            del self.conversation_history[:-24]
+
+    def _cache_answer(self, prepared: Dict[str, Any], question: str, answer: str) -> None:
+        if prepared["question_vector"] is not None and answer:
+            self.answer_cache.put(prepared["answer_scope"], question, prepared["question_vector"], answer)
+
+    def _llm_error_answer(self, e: Exception) -> Optional[str]:
+        """Maps an LLM failure to a reply; None means embeddings were reloaded and the question should be retried."""
+        print(f"[WARNING] LLM Error: {e}")
+        if "401" in str(e) or "invalid" in str(e).lower():
+            return "[ERROR] Invalid GROQ API key. Please check your GROQ_API_KEY in backend/.env file. Get a new key from the Groq console."
+        elif not self.embeddings_available:
+            # Try to reload embeddings once per session
+            if not hasattr(self, '_embeddings_retry_attempted'):
+                self._embeddings_retry_attempted = True
+                print("[INFO] Attempting to reload embeddings...]")
+                if self.retry_embeddings_loading():
+                    return None
+
+            return "I'm running in offline mode right now. I can help with simple math problems like '5 + 3' or general conversations, but I cannot access educational documents. Check your internet connection and try restarting the application."
+        else:
+            return f"I'm having trouble connecting to my language model right now: {e}. Please try again or check your API key."
+
+    def prefetch(self, question: str, top_k: int = 5) -> None:
+        """
+        Retrieval for `question` ahead of query(): fills the query embedding
+        and retrieval caches so a query() for the same text skips both.
+        Doesn't touch the conversation history or the current subject.
+        """
+        if not question or not self.should_use_rag(question):
+            return
+        subject = self.detect_subject_and_intent(question)["subject"]
+        current_subject = self.current_subject
+        if subject == "general" and current_subject:
+            subject = current_subject
+        try:
+            self.get_relevant_context(question, subject, top_k)
+        except Exception as e:
+            print(f"[WARNING] Retrieval prefetch failed: {e}")
 
-        self.conversation_history.append({"role": "assistant", "content": answer})
+    def query(self, question: str, top_k: int = 5, target_language: str = "en") -> str:
+        prepared = self._prepare_query(question, top_k, target_language)
+        if "answer" in prepared:
+            if prepared["record"]:
+                self._record_answer(prepared["answer"])
+            return prepared["answer"]
 
-        if len(self.conversation_history) > 24:
-            self.conversation_history = self.conversation_history[-24:]
+        try:
+            response = self.llm.invoke(prepared["prompt"])
+            answer = response.content.strip()
+            self._cache_answer(prepared, question, answer)
+        except Exception as e:
+            answer = self._llm_error_answer(e)
+            if answer is None:
+                return self.query(question, top_k, target_language=prepared["normalized_language"])
 
+        self._record_answer(answer)
         return answer
+
+    def query_stream(self, question: str, top_k: int = 5, target_language: str = "en") -> Iterator[str]:
+        """Like query(), but yields the answer in pieces as the LLM streams it."""
+        prepared = self._prepare_query(question, top_k, target_language)
+        if "answer" in prepared:
+            if prepared["record"]:
+                self._record_answer(prepared["answer"])
+            yield prepared["answer"]
+            return
+
+        parts: List[str] = []
+        try:
+            for chunk in self.llm.stream(prepared["prompt"]):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield chunk.content
+            answer = "".join(parts).strip()
+            self._cache_answer(prepared, question, answer)
+        except Exception as e:
+            if parts:
+                # Part of the answer is already out; keep it rather than appending an error
+                print(f"[WARNING] LLM stream interrupted: {e}")
+                answer = "".join(parts).strip()
+            else:
+                answer = self._llm_error_answer(e)
+                if answer is None:
+                    yield from self.query_stream(question, top_k, target_language=prepared["normalized_language"])
+                    return
+                yield answer
+
+        self._record_answer(answer)
+
+
+def auto_ingest_docs(rag: RAGSystem, docs_folder: str = "./docs") -> None:
+    """Indexes every supported file in `docs_folder`, skipping ones already ingested."""
+    if not os.path.exists(docs_folder):
+        os.makedirs(docs_folder)
+        return
+    files = [f for f in os.listdir(docs_folder) if os.path.isfile(os.path.join(docs_folder, f))]
+    if not files:
+        return
+    file_paths = [
+        os.path.join(docs_folder, file_name)
+        for file_name in sorted(files)
+        if os.path.splitext(file_name)[1].lower() in SUPPORTED_EXTENSIONS
+    ]
+    try:
+        # Skips files the ingestion manifest already has indexed and
+        # extracts the rest in parallel
+        rag.ingest_paths(file_paths)
+    except Exception:
+        pass
@@ -0,0 +1,306 @@
+"""
+Live questions over a WebSocket: audio arrives while the child is still
+speaking, partial transcripts go back as it is decoded, and the answer is
+started as soon as the child stops talking.
+
+- `SpeechStream` buffers 16-bit mono PCM, tracks speech and silence with
+  the same energy measure as the VAD pre-pass, and keeps a sliding decode
+  window: once the window grows past `window_seconds`, its text up to the
+  last pause is committed and the window moves on.
+- `LiveQuestion` drives one connection: periodic partial decodes on the
+  STT stage, then at end of speech a final decode and a speculative
+  `stream_answer`. If the child starts talking again (a sustained run of
+  speech, not a cough or the answer's own audio leaking back) before the
+  answer is done, that answer is cancelled and a new one starts at the
+  next pause.
+"""
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from audio_decode import resample, WHISPER_SAMPLE_RATE
+from stage_pool import StageSaturated
+from vad import FRAME_MS, frame_energy_db
+
+
+class SpeechStream:
+    """
+    Audio of one spoken question, received in chunks.
+
+    Each chunk is measured once when it arrives: chunks are kept in a list
+    (never re-concatenated), its complete frames are judged voiced or not
+    against the noise floor of the last `floor_seconds` of frames, and
+    audio and frame flags before `window_start` are dropped on commit, so
+    a feed costs the same however long the child talks. The floor is
+    capped at `max_noise_db`, so speech heard before any silence still
+    counts as speech.
+    """
+
+    def __init__(self, sample_rate: int = WHISPER_SAMPLE_RATE, end_silence_ms: int = 700,
+                 margin_db: float = 12.0, min_db: float = -50.0, max_noise_db: float = -50.0,
+                 min_speech_ms: int = 90, window_seconds: float = 25.0, floor_seconds: float = 10.0):
+        self.sample_rate = sample_rate
+        self.end_silence_ms = end_silence_ms
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.max_noise_db = max_noise_db
+        self.min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+        self.window_samples = int(window_seconds * sample_rate)
+        self.frame = max(1, sample_rate * FRAME_MS // 1000)
+
+        self.samples = 0        # received so far, in samples at `sample_rate`
+        self.window_start = 0
+        self.committed: List[str] = []
+        self._chunks: List[np.ndarray] = []   # audio from `_chunks_start` on
+        self._chunks_start = 0
+        self._partial = np.zeros(0, dtype=np.float32)   # samples not yet in a complete frame
+        self._levels: Deque[float] = deque(maxlen=max(1, int(floor_seconds * 1000) // FRAME_MS))
+        self._voiced = bytearray()   # 1 per voiced frame, from frame `_frames_start` on
+        self._frames_start = 0
+        self._frames = 0             # complete frames so far
+        self._voiced_count = 0
+        self._last_voiced = -1       # index of the last voiced frame
+
+    def feed(self, pcm: bytes) -> None:
+        """Appends little-endian 16-bit mono PCM."""
+        usable = len(pcm) - len(pcm) % 2
+        chunk = np.frombuffer(pcm[:usable], dtype="<i2").astype(np.float32) / 32768.0
+        if len(chunk) == 0:
+            return
+        self._chunks.append(chunk)
+        self.samples += len(chunk)
+
+        pending = np.concatenate([self._partial, chunk])
+        levels = frame_energy_db(pending, self.sample_rate, FRAME_MS)
+        self._partial = pending[len(levels) * self.frame:]
+        if len(levels) == 0:
+            return
+        self._levels.extend(levels.tolist())
+        noise_floor = min(float(np.percentile(self._levels, 10)), self.max_noise_db)
+        threshold = max(noise_floor + self.margin_db, self.min_db)
+        for level in levels:
+            voiced = bool(level > threshold)
+            self._voiced.append(voiced)
+            if voiced:
+                self._voiced_count += 1
+                self._last_voiced = self._frames
+            self._frames += 1
+
+    # ---------------- Speech state ----------------
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+    @property
+    def heard_speech(self) -> bool:
+        return self._voiced_count >= self.min_speech_frames
+
+    @property
+    def trailing_silence_ms(self) -> int:
+        return (self._frames - self._last_voiced - 1) * FRAME_MS
+
+    def voiced_run_since(self, sample_index: int) -> int:
+        """Longest run of consecutive voiced frames from `sample_index` on."""
+        first = max(0, sample_index // self.frame - self._frames_start)
+        voiced = np.frombuffer(bytes(self._voiced[first:]), dtype=np.uint8)
+        if not voiced.any():
+            return 0
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced, [0]))))
+        return int((edges[1::2] - edges[::2]).max())
+
+    @property
+    def ended(self) -> bool:
+        """Speech was heard and has been followed by `end_silence_ms` of silence."""
+        return self.heard_speech and self.trailing_silence_ms >= self.end_silence_ms
+
+    # ---------------- Sliding window ----------------
+    def window_parts(self, end: Optional[int] = None, start: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Views of the undecided audio from `start` up to `end`, cheap enough
+        for the event loop; `join_window` turns them into Whisper input on a
+        worker.
+        """
+        end = self.samples if end is None else min(end, self.samples)
+        start = self.window_start if start is None else max(start, self.window_start)
+        parts, position = [], self._chunks_start
+        for chunk in self._chunks:
+            lo, hi = max(start, position), min(end, position + len(chunk))
+            if lo < hi:
+                parts.append(chunk[lo - position:hi - position])
+            position += len(chunk)
+        return parts
+
+    def join_window(self, parts: List[np.ndarray]) -> np.ndarray:
+        """Window audio from `window_parts`, resampled to 16 kHz for Whisper."""
+        samples = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+        return resample(samples, self.sample_rate, WHISPER_SAMPLE_RATE)
+
+    def window(self, end: Optional[int] = None) -> np.ndarray:
+        """Undecided audio, resampled to 16 kHz for Whisper."""
+        return self.join_window(self.window_parts(end))
+
+    def cut_point(self) -> Optional[int]:
+        """Where to commit the window once it is too long: the end of its last pause."""
+        if self.samples - self.window_start <= self.window_samples:
+            return None
+        voiced = np.frombuffer(bytes(self._voiced), dtype=np.uint8)
+        ends = (np.flatnonzero(voiced == 0) + self._frames_start + 1) * self.frame
+        ends = ends[(ends > self.window_start) & (ends < self.samples)]
+        # No pause at all: cut at the window length rather than grow without bound
+        return int(ends[-1]) if len(ends) else self.window_start + self.window_samples
+
+    def commit(self, text: str, cut: int) -> None:
+        """Commits the window's text up to `cut` and drops the audio before it."""
+        if text:
+            self.committed.append(text)
+        self.window_start = cut
+        while self._chunks and self._chunks_start + len(self._chunks[0]) <= cut:
+            self._chunks_start += len(self._chunks.pop(0))
+        first_frame = cut // self.frame
+        if first_frame > self._frames_start:
+            del self._voiced[:first_frame - self._frames_start]
+            self._frames_start = first_frame
+
+    def transcript(self, window_text: str = "") -> str:
+        return " ".join(t for t in self.committed + [window_text] if t).strip()
+
+
+class LiveQuestion:
+    """
+    One WebSocket conversation. `send` delivers a JSON-able dict to the
+    client. Every message carries `turn`, which goes up each time a new
+    answer is started, so the client can drop a cancelled answer's events.
+
+    A speculative answer is only cancelled by `resume_ms` of unbroken speech.
+    Partial transcripts decode at most the last `partial_seconds` of the
+    window; the final decode at end of speech always covers all of it.
+    """
+
+    def __init__(self, chatbot, send: Callable[[Dict[str, Any]], Awaitable[None]], language_hint: Optional[str],
+                 sample_rate: int = WHISPER_SAMPLE_RATE, partial_every_ms: int = 1000, end_silence_ms: int = 700,
+                 resume_ms: int = 300, partial_seconds: float = 8.0):
+        self.chatbot = chatbot
+        self._send = send
+        self.language_hint = language_hint
+        self.sample_rate = sample_rate
+        self.partial_every = partial_every_ms / 1000.0
+        self.end_silence_ms = end_silence_ms
+        self.resume_frames = max(1, resume_ms // FRAME_MS)
+        self.partial_samples = int(partial_seconds * sample_rate)
+        self.turn = 0
+        self.stream = self._new_stream()
+        self._send_lock = asyncio.Lock()
+        self._partial_task: Optional[asyncio.Future] = None
+        self._answer_task: Optional[asyncio.Future] = None
+        self._answered = False   # the current answer ran to "done"
+        self._ended_at = 0       # sample index where the current answer's question ended
+        self._last_partial_at = 0.0
+
+    def _new_stream(self) -> SpeechStream:
+        return SpeechStream(self.sample_rate, end_silence_ms=self.end_silence_ms)
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self._send({**message, "turn": self.turn})
+
+    # ---------------- Input ----------------
+    async def feed(self, pcm: bytes) -> None:
+        if self._answered:
+            # The last question was answered; this audio starts the next one
+            self.stream, self._answered = self._new_stream(), False
+            self._last_partial_at = 0.0
+        self.stream.feed(pcm)
+
+        if self._answer_task is not None and \
+                self.stream.voiced_run_since(self._ended_at) >= self.resume_frames:
+            # The child kept talking: the speculative answer was premature
+            await self._cancel_answer()
+            await self.send({"type": "cancelled"})
+
+        if self.stream.ended and self._answer_task is None:
+            await self.end_of_speech()
+        elif (self._partial_task is None or self._partial_task.done()) and self._answer_task is None \
+                and self.stream.heard_speech and self.stream.duration - self._last_partial_at >= self.partial_every:
+            self._last_partial_at = self.stream.duration
+            self._partial_task = asyncio.ensure_future(self._partial())
+
+    async def end_of_speech(self) -> None:
+        """Final decode and speculative answer; also called when the client says recording stopped."""
+        if self._answer_task is not None or self._answered:
+            return
+        if self.stream.samples == 0:
+            await self.send({"type": "error", "detail": "No audio received"})
+            return
+        if self._partial_task is not None:
+            await asyncio.gather(self._partial_task, return_exceptions=True)
+        await self._commit_overflow()
+        text, language = await self._decode(self.stream.window_parts())
+        self._ended_at = self.stream.samples
+        question = self.stream.transcript(self._text(text)) or self.chatbot.NO_SPEECH
+        self.turn += 1
+        await self.send({"type": "question", "question": question, "language": language})
+        self._answer_task = asyncio.ensure_future(self._answer(question, language))
+
+    # ---------------- Decoding ----------------
+    def _text(self, text: str) -> str:
+        return "" if text == self.chatbot.NO_SPEECH else text
+
+    async def _decode(self, parts: List[np.ndarray], wait: bool = True):
+        """STT of window audio on the STT stage; joining and resampling happen there too, off the loop."""
+        stream = self.stream
+        return await self.chatbot.stages["stt"].run_async(
+            lambda: self.chatbot.stt(stream.join_window(parts), language_hint=self.language_hint), wait=wait
+        )
+
+    async def _partial(self) -> None:
+        try:
+            await self._commit_overflow(wait=False)
+            # Only the tail: a partial costs the same however long the window is
+            start = self.stream.samples - self.partial_samples
+            text, _ = await self._decode(self.stream.window_parts(start=start), wait=False)
+        except StageSaturated:
+            return   # the next chunk will try again
+        except Exception as e:
+            print(f"[Live STT] ⚠️ Partial decode failed: {e}")
+            return
+        text = self._text(text)
+        if text and start > self.stream.window_start:
+            text = "… " + text
+        if self._answer_task is None:
+            await self.send({"type": "partial", "text": self.stream.transcript(text)})
+
+    async def _commit_overflow(self, wait: bool = True) -> None:
+        """Decodes and commits the oldest part of the window while it is longer than the limit."""
+        cut = self.stream.cut_point()
+        while cut is not None:
+            text, _ = await self._decode(self.stream.window_parts(cut), wait=wait)
+            self.stream.commit(self._text(text), cut)
+            cut = self.stream.cut_point()
+
+    # ---------------- Answer ----------------
+    async def _answer(self, question: str, language: str) -> None:
+        try:
+            async for event, data in self.chatbot.stream_answer(question, language):
+                await self.send({"type": event, **data})
+            self._answered = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.send({"type": "error", "detail": str(e)})
+            self._answered = True
+        finally:
+            if self._answered:
+                self._answer_task = None
+
+    async def _cancel_answer(self) -> None:
+        task, self._answer_task = self._answer_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def close(self) -> None:
+        await self._cancel_answer()
+        if self._partial_task is not None:
+            self._partial_task.cancel()
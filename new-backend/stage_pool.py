@@ -0,0 +1,230 @@
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class StageSaturated(Exception):
+    """Raised when a stage's queue is full; `retry_after` is a suggested wait in seconds."""
+
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(f"{stage} stage is saturated, retry in {retry_after}s")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+def _grant(future: asyncio.Future) -> None:
+    """Runs on the waiter's loop. A waiter cancelled meanwhile hands the slot on itself."""
+    if not future.done():
+        future.set_result(None)
+
+
+class StagePool:
+    """
+    Bounded thread pool for one pipeline stage (STT, LLM, TTS, images).
+
+    At most `workers` calls run at once and at most `max_queue` more wait
+    for a worker. Past that, `run_async(..., wait=False)` raises
+    StageSaturated instead of queueing, which the API turns into a 503.
+
+    Callers that do wait for a slot are served first come, first served.
+    Async callers wait on an asyncio future rather than a parked thread, so
+    a cancelled waiter (client gone) simply leaves the line; a slot handed
+    to it just as it was cancelled is passed on.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{name}-stage")
+        self._free = self.workers + self.max_queue
+        # FIFO of callers waiting for a slot: threading.Event or [loop, asyncio.Future, granted]
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+        self.pending = 0   # queued + running
+        self.completed = 0
+        self.rejected = 0
+        self.avg_seconds = 0.0  # moving average of run time, used for Retry-After
+        self.avg_wait_seconds = 0.0  # moving average of time queued before a worker picked the call up
+
+    def _take_or_reject_locked(self, wait: bool) -> bool:
+        """Takes a free slot if there is one; otherwise raises unless the caller will wait."""
+        if self._free > 0:
+            self._free -= 1
+            self.pending += 1
+            return True
+        if not wait:
+            self.rejected += 1
+            raise StageSaturated(self.name, self._retry_after_locked())
+        return False
+
+    def _acquire(self, wait: bool) -> None:
+        """Blocking acquire for synchronous callers."""
+        with self._lock:
+            if self._take_or_reject_locked(wait):
+                return
+            granted = threading.Event()
+            self._waiters.append(granted)
+        granted.wait()
+
+    async def _acquire_async(self, wait: bool) -> None:
+        with self._lock:
+            if self._take_or_reject_locked(wait):
+                return
+            loop = asyncio.get_running_loop()
+            waiter = [loop, loop.create_future(), False]   # loop, future, granted
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                granted = waiter[2]
+            if granted:
+                # The slot reached us as we were cancelled; hand it on
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        """Frees a slot, handing it straight to the longest waiting caller if any."""
+        with self._lock:
+            self.pending -= 1
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    self.pending += 1
+                    waiter.set()
+                    return
+                loop, future, _ = waiter
+                if future.done():
+                    continue   # cancelled, leaving the line
+                try:
+                    loop.call_soon_threadsafe(_grant, future)
+                except RuntimeError:
+                    continue   # its loop is gone
+                waiter[2] = True
+                self.pending += 1
+                return
+            self._free += 1
+
+    def _timed(self, queued: float, stage_timings: Optional[Dict[str, Any]], fn: Callable,
+               *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            waited = start - queued
+            if stage_timings is not None:
+                stage_timings[self.name] = {"queue_seconds": round(waited, 3), "run_seconds": round(elapsed, 3)}
+            with self._lock:
+                self.completed += 1
+                first = self.completed == 1
+                self.avg_seconds = elapsed if first else 0.8 * self.avg_seconds + 0.2 * elapsed
+                self.avg_wait_seconds = waited if first else 0.8 * self.avg_wait_seconds + 0.2 * waited
+            self._release()
+
+    async def run_async(self, fn: Callable, *args, wait: bool = True,
+                        stage_timings: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        """
+        Runs `fn` on this stage's pool without blocking the event loop. If
+        `stage_timings` is given, the call's queue and run time are stored
+        in it under the stage name; every other keyword goes to `fn`.
+        """
+        queued = time.perf_counter()
+        await self._acquire_async(wait)
+        return await asyncio.wrap_future(self._submit_acquired(queued, stage_timings, fn, *args, **kwargs))
+
+    def run(self, fn: Callable, *args, stage_timings: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        """Blocking variant for synchronous callers."""
+        queued = time.perf_counter()
+        self._acquire(True)
+        return self._submit_acquired(queued, stage_timings, fn, *args, **kwargs).result()
+
+    def submit(self, fn: Callable, *args, wait: bool = False, **kwargs) -> Future:
+        """Queues a background call; raises StageSaturated if the queue is full (unless `wait`)."""
+        queued = time.perf_counter()
+        self._acquire(wait)
+        return self._submit_acquired(queued, None, fn, *args, **kwargs)
+
+    def _submit_acquired(self, queued: float, stage_timings: Optional[Dict[str, Any]], fn: Callable,
+                         *args, **kwargs) -> Future:
+        future = self._executor.submit(self._timed, queued, stage_timings, fn, *args, **kwargs)
+        # A call cancelled before a worker picked it up never reaches _timed, so free its slot here
+        future.add_done_callback(lambda f: self._release() if f.cancelled() else None)
+        return future
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up."""
+        with self._lock:
+            return self._retry_after_locked()
+
+    def _retry_after_locked(self) -> int:
+        backlog = (self.pending + len(self._waiters)) / self.workers
+        return max(1, math.ceil(self.avg_seconds * backlog))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "pending": self.pending,
+                "waiting": len(self._waiters),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_seconds": round(self.avg_seconds, 3),
+                "avg_wait_seconds": round(self.avg_wait_seconds, 3),
+            }
+
+
+class StageTimeline:
+    """
+    When each stage of one request started and ended, in seconds since the
+    request began, plus one-off events ("first_token", ...). `to_dict`
+    compares the wall time with the sum of stage durations, i.e. what the
+    stages would have taken back to back.
+    """
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.events: Dict[str, float] = {}
+
+    def _now(self) -> float:
+        return round(time.perf_counter() - self._t0, 3)
+
+    def start(self, stage: str) -> None:
+        with self._lock:
+            self.stages.setdefault(stage, {"start": self._now()})
+
+    def end(self, stage: str) -> None:
+        """Marks `stage` done; a stage with several parts ends with its last one."""
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"start": self._now()})
+            entry["end"] = max(entry.get("end", 0.0), self._now())
+
+    def mark(self, event: str) -> None:
+        with self._lock:
+            self.events.setdefault(event, self._now())
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            wall = self._now()
+            stages = {
+                name: {**times, "seconds": round(times.get("end", wall) - times["start"], 3)}
+                for name, times in self.stages.items()
+            }
+            sequential = round(sum(s["seconds"] for s in stages.values()), 3)
+            return {
+                "stages": stages,
+                "events": dict(self.events),
+                "wall_seconds": wall,
+                "sequential_seconds": sequential,
+                "overlap_saved_seconds": round(max(0.0, sequential - wall), 3),
+            }
@@ -0,0 +1,86 @@
+import os
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def default_cpu_threads(instances: int) -> int:
+    """Splits the machine's cores evenly between model instances."""
+    return max(1, (os.cpu_count() or 1) // max(1, instances))
+
+
+class WhisperPool:
+    """
+    `instances` Whisper models, each limited to `cpu_threads` cores, so
+    several transcriptions decode side by side instead of queueing behind
+    one model.
+
+    `transcribe` checks a model out, decodes fully (faster-whisper decodes
+    lazily while segments are iterated, so that must happen before the
+    model is handed back) and returns it. Callers waiting for a model are
+    woken in arrival order; run behind a StagePool with as many workers as
+    instances, requests are decoded strictly first come, first served. Each
+    call reports how long it waited for a model and how long the decode took.
+    """
+
+    def __init__(self, model_size: str = "small", instances: int = 1, cpu_threads: Optional[int] = None,
+                 loader: Optional[Callable[[int], Any]] = None):
+        self.model_size = model_size
+        self.instances = max(1, instances)
+        self.cpu_threads = cpu_threads or default_cpu_threads(self.instances)
+        loader = loader or self._load_model
+        # FIFO: models go back to the end and waiters are woken in order
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        for _ in range(self.instances):
+            self._idle.put(loader(self.cpu_threads))
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.busy = 0
+        self.total_wait = 0.0
+        self.total_decode = 0.0
+
+    def _load_model(self, cpu_threads: int):
+        from faster_whisper import WhisperModel
+        return WhisperModel(self.model_size, device="cpu", compute_type="int8", cpu_threads=cpu_threads)
+
+    def transcribe(self, audio, on_segment: Optional[Callable[[Any], None]] = None,
+                   **kwargs) -> Tuple[List[Any], Any, Dict[str, float]]:
+        """
+        Returns (segments, info, {"wait_seconds", "decode_seconds"}).
+        `on_segment` is called with each segment as soon as it is decoded.
+        """
+        queued = time.perf_counter()
+        model = self._idle.get()
+        started = time.perf_counter()
+        with self._lock:
+            self.busy += 1
+        try:
+            lazy_segments, info = model.transcribe(audio, **kwargs)
+            segments = []
+            for segment in lazy_segments:
+                segments.append(segment)
+                if on_segment is not None:
+                    on_segment(segment)
+        finally:
+            self._idle.put(model)
+            finished = time.perf_counter()
+            with self._lock:
+                self.busy -= 1
+                self.completed += 1
+                self.total_wait += started - queued
+                self.total_decode += finished - started
+        timing = {"wait_seconds": round(started - queued, 3), "decode_seconds": round(finished - started, 3)}
+        return segments, info, timing
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "instances": self.instances,
+                "cpu_threads": self.cpu_threads,
+                "busy": self.busy,
+                "completed": self.completed,
+                "avg_wait_seconds": round(self.total_wait / done, 3),
+                "avg_decode_seconds": round(self.total_decode / done, 3),
+            }
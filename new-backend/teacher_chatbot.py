@@ -1,5 +1,6 @@
 import os
-from rag_system import RAGSystem
+from rag_system import RAGSystem, auto_ingest_docs
+from text_utils import clean_text
 from dotenv import load_dotenv
 import pygame
 import requests
@@ -9,51 +10,11 @@ import torch
 import numpy as np
 from scipy.io.wavfile import write as write_wav
 import subprocess
-import re
-import unicodedata
-import inflect
 from RealtimeSTT import AudioToTextRecorder
-
-p = inflect.engine()
 from murf import Murf
 
 
 
-# ----------------- SYMBOL MAP -----------------
-SYMBOL_MAP = {
-    '+': 'plus',
-    '-': 'minus',
-    '*': 'times',
-    '/': 'divided by',
-    '=': 'equals',
-    '%': 'percent',
-    '>': 'greater than',
-    '<': 'less than',
-    '&': 'and',
-    '@': 'at',
-    '#': 'number',
-    '$': 'dollar',
-    '^': 'caret',
-    '√': 'square root',
-}
-
-# ----------------- CLEAN TEXT -----------------
-def clean_text(text):
-    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
-    for symbol, word in SYMBOL_MAP.items():
-        text = text.replace(symbol, f' {word} ')
-
-    def replace_digits(match):
-        num = int(match.group(0))
-        return p.number_to_words(num)
-    text = re.sub(r'\b\d+\b', replace_digits, text)
-
-    text = re.sub(r'[^\w\s.,\'-]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    if not text:
-        return "Let's try again."
-    return text
-
 # ----------------- TTS SETUP -----------------
 # from ChatTTS import Chat
 # chattts = ChatTTS.Chat()
@@ -95,26 +56,6 @@ def speak_with_chattts(text1):
     while pygame.mixer.music.get_busy():
         pygame.time.Clock().tick(10)
 
-# ----------------- DOC INGEST -----------------
-def auto_ingest_docs(rag, docs_folder="./docs"):
-    if not os.path.exists(docs_folder):
-        os.makedirs(docs_folder)
-        return
-    supported_exts = {".pdf", ".docx", ".pptx", ".txt"}
-    files = [f for f in os.listdir(docs_folder) if os.path.isfile(os.path.join(docs_folder, f))]
-    if not files:
-        return
-    for file_name in files:
-        ext = os.path.splitext(file_name)[1].lower()
-        if ext in supported_exts:
-            file_path = os.path.join(docs_folder, file_name)
-            try:
-                with open(file_path, "rb") as f:
-                    file_bytes = f.read()
-                rag.ingest_file(file_name, file_bytes)
-            except Exception:
-                pass
-
 # ----------------- TEXT CHAT -----------------
 def chat_mode(rag):
     print("\n🎓 **Text Chat Mode**")
@@ -1,52 +1,153 @@
+import io
 import os
+import json
 import uuid
+import wave
+import time
+import asyncio
+import threading
 import subprocess
-import requests
-import pygame
-from murf import Murf
-from faster_whisper import WhisperModel
 from pathlib import Path
-from rag_system import RAGSystem
-from teacher_chatbot import auto_ingest_docs, clean_text
-from config import OUTPUT_DIR, MURF_VOICE_EN, MURF_VOICE_TA, GROQ_API_KEY, IMAGES_DIR
-from image_generator import ImageGenerator
+from text_utils import clean_text, split_sentences, SentenceBuffer
+from stage_pool import StagePool, StageSaturated, StageTimeline
+from image_jobs import ImageJobStore
+from config import (
+    OUTPUT_DIR, MURF_VOICE_EN, MURF_VOICE_TA, GROQ_API_KEY, IMAGES_DIR, STT_MODEL_SIZE,
+    STT_WORKERS, STT_CPU_THREADS, LLM_WORKERS, TTS_WORKERS, IMAGE_WORKERS, STAGE_MAX_QUEUE,
+    TTS_SEGMENT_PARALLELISM, TTS_SEGMENT_MIN_CHARS, TTS_CACHE_MAX_MB,
+    TTS_CACHE_GRACE_SECONDS, TTS_CACHE_INDEX,
+    IMAGES_IN_BACKGROUND, IMAGE_JOB_TTL,
+    STT_VAD_ENABLED, STT_VAD_MARGIN_DB, STT_VAD_MAX_NOISE_DB, STT_VAD_PAD_MS, STT_VAD_MAX_PAUSE_MS,
+)
+from tts_cache import TTSCache
+from http_clients import http_session, murf_client
 
 
-pygame.mixer.init()
+def wav_duration(path):
+    """Length of a WAV file (path or file object) in seconds, or None if it can't be read as WAV."""
+    try:
+        with wave.open(path if hasattr(path, "read") else str(path), "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError, OSError):
+        return None
 
 
 class TeacherChatbot:
+    """
+    Q&A pipeline behind the FastAPI app: STT -> RAG answer -> TTS -> images.
+
+    The heavy components (Whisper, the RAG system with its embedding model
+    and index, the image generator) are created on first use, so
+    constructing the chatbot and importing this module are cheap. Call
+    `warmup()` from a background thread to load them ahead of the first
+    request; `component_status()` reports which ones are ready.
+    """
+
     SUPPORTED_LANGUAGES = {"en", "ta"}
+    NO_SPEECH = "Could not understand"   # stt() result when nothing was transcribed
+    COMPONENTS = ("stt_model", "rag", "image_generator")
 
     def __init__(self, murf_api_key, docs_folder="./docs"):
         self.murf_api_key = murf_api_key
-        self.stt_model = WhisperModel("small", device="cpu", compute_type="int8")  # Whisper model
-        
-        # ---------------- RAG SYSTEM ----------------
-        self.rag = RAGSystem()
-        auto_ingest_docs(self.rag, docs_folder)
+        self.docs_folder = docs_folder
         self.voice_map = {
             "en": MURF_VOICE_EN,
             "ta": MURF_VOICE_TA or MURF_VOICE_EN,
         }
         OUTPUT_DIR.mkdir(exist_ok=True)
-        
-        # ---------------- IMAGE GENERATOR ----------------
-        self.image_generator = None
-        print(f"[TeacherChatbot] Checking image generator initialization...")
-        print(f"[TeacherChatbot] GROQ_API_KEY present: {bool(GROQ_API_KEY)}")
-        
-        if GROQ_API_KEY:
+        # Synthesized speech keyed by (text, voice, format); files live in OUTPUT_DIR
+        self.tts_cache = TTSCache(
+            str(OUTPUT_DIR), max_bytes=TTS_CACHE_MAX_MB * 1024 * 1024,
+            index_path=str(TTS_CACHE_INDEX), grace_seconds=TTS_CACHE_GRACE_SECONDS,
+        )
+
+        self._components = {}
+        self._status = {name: {"state": "cold"} for name in self.COMPONENTS}
+        self._component_locks = {name: threading.Lock() for name in self.COMPONENTS}
+
+        # Background image generation for /ask, polled or pushed by job id
+        self.image_jobs = ImageJobStore(ttl=IMAGE_JOB_TTL)
+
+        # Bounded pools per pipeline stage: STT is CPU-bound, the rest wait on the network
+        self.stages = {
+            "stt": StagePool("stt", STT_WORKERS, STAGE_MAX_QUEUE),
+            "llm": StagePool("llm", LLM_WORKERS, STAGE_MAX_QUEUE),
+            "tts": StagePool("tts", TTS_WORKERS, STAGE_MAX_QUEUE),
+            "images": StagePool("images", IMAGE_WORKERS, STAGE_MAX_QUEUE),
+        }
+
+    # ---------------- Lazy components ----------------
+    def _component(self, name, loader):
+        """Returns component `name`, loading it with `loader` on first use (once, across threads)."""
+        if name in self._components:
+            return self._components[name]
+        with self._component_locks[name]:
+            if name not in self._components:
+                self._status[name] = {"state": "loading"}
+                start = time.perf_counter()
+                try:
+                    component = loader()
+                except Exception as e:
+                    self._status[name] = {"state": "failed", "error": str(e)}
+                    raise
+                self._components[name] = component
+                self._status[name] = {"state": "ready", "load_seconds": round(time.perf_counter() - start, 2)}
+        return self._components[name]
+
+    @property
+    def stt_model(self):
+        """Pool of Whisper models, one per STT worker, so transcriptions run side by side."""
+        def load():
+            from stt_pool import WhisperPool
+            pool = WhisperPool(STT_MODEL_SIZE, instances=STT_WORKERS, cpu_threads=STT_CPU_THREADS or None)
+            print(f"[TeacherChatbot] Whisper '{STT_MODEL_SIZE}' x{pool.instances}, {pool.cpu_threads} threads each")
+            return pool
+        return self._component("stt_model", load)
+
+    @property
+    def rag(self):
+        def load():
+            from rag_system import RAGSystem, auto_ingest_docs
+            rag = RAGSystem()
+            auto_ingest_docs(rag, self.docs_folder)
+            return rag
+        return self._component("rag", load)
+
+    @property
+    def image_generator(self):
+        def load():
+            print(f"[TeacherChatbot] Checking image generator initialization...")
+            print(f"[TeacherChatbot] GROQ_API_KEY present: {bool(GROQ_API_KEY)}")
+            if not GROQ_API_KEY:
+                print("[TeacherChatbot] ❌ Image generator disabled (missing GROQ_API_KEY)")
+                return None
             try:
-                self.image_generator = ImageGenerator(
+                from image_generator import ImageGenerator
+                generator = ImageGenerator(
                     groq_api_key=GROQ_API_KEY,
                     output_dir=IMAGES_DIR
                 )
                 print("[TeacherChatbot] ✅ Image generator initialized (Pollinations.ai - Free, No Auth)")
+                return generator
             except Exception as e:
                 print(f"[TeacherChatbot] ❌ Image generator initialization failed: {e}")
-        else:
-            print("[TeacherChatbot] ❌ Image generator disabled (missing GROQ_API_KEY)")
+                return None
+        return self._component("image_generator", load)
+
+    def warmup(self, components=None):
+        """Loads the given components (default: all) so requests don't pay for it."""
+        for name in components or self.COMPONENTS:
+            try:
+                getattr(self, name)
+                print(f"[TeacherChatbot] Warm: {name} ({self._status[name].get('load_seconds')}s)")
+            except Exception as e:
+                print(f"[TeacherChatbot] ❌ Warmup of {name} failed: {e}")
+
+    def component_status(self):
+        return {name: dict(status) for name, status in self._status.items()}
+
+    def is_ready(self):
+        return all(status["state"] == "ready" for status in self._status.values())
 
     def _normalize_language(self, language_hint):
         if not language_hint:
@@ -65,12 +166,57 @@ class TeacherChatbot:
         return normalized_detected or "en"
 
     # ---------------- STT ----------------
-    def stt(self, audio_path, language_hint=None):
+    def stt(self, audio, language_hint=None, timings=None, on_text=None):
+        """
+        Transcribes `audio`: a file path or 16 kHz mono float32 samples (see
+        audio_decode). With STT_VAD_ENABLED, silence is cut first and long
+        clips are decoded in speech chunks. With a `timings` dict, stores
+        model wait and decode time under "stt_model". `on_text` is called
+        with the transcript so far each time Whisper finishes a segment.
+        """
         normalized_hint = self._normalize_language(language_hint)
-        segments, info = self.stt_model.transcribe(audio_path, language=normalized_hint, task="transcribe")
-        text = " ".join([seg.text for seg in segments]).strip()
+        chunks = self._speech_chunks(audio) if STT_VAD_ENABLED else [audio]
+
+        texts, info, language = [], None, normalized_hint
+        timing = {"wait_seconds": 0.0, "decode_seconds": 0.0}
+
+        def heard(segment):
+            texts.append(segment.text)
+            if on_text is not None:
+                on_text(" ".join(texts).strip())
+
+        for chunk in chunks:
+            _, chunk_info, chunk_timing = self.stt_model.transcribe(
+                chunk, on_segment=heard, language=language, task="transcribe"
+            )
+            if info is None:
+                # Later chunks keep the language detected on the first one
+                info, language = chunk_info, language or getattr(chunk_info, "language", None)
+            for key in timing:
+                timing[key] = round(timing[key] + chunk_timing[key], 3)
+        print(f"[STT] Waited {timing['wait_seconds']:.2f}s for a model, decoded in {timing['decode_seconds']:.2f}s")
+        if timings is not None:
+            timings["stt_model"] = timing
+        text = " ".join(texts).strip()
         detected_language = self._resolve_response_language(normalized_hint, getattr(info, "language", None))
-        return text or "Could not understand", detected_language
+        return text or self.NO_SPEECH, detected_language
+
+    @staticmethod
+    def _speech_chunks(audio):
+        """Speech-only chunks of `audio` (see vad.prepare_speech)."""
+        from audio_decode import decode_audio_bytes, WHISPER_SAMPLE_RATE
+        from vad import prepare_speech
+        if isinstance(audio, (str, Path)):
+            with open(audio, "rb") as f:
+                audio = decode_audio_bytes(f.read())
+        chunks = prepare_speech(
+            audio, margin_db=STT_VAD_MARGIN_DB, max_noise_db=STT_VAD_MAX_NOISE_DB, pad_ms=STT_VAD_PAD_MS,
+            max_pause_ms=STT_VAD_MAX_PAUSE_MS,
+        )
+        kept = sum(len(c) for c in chunks)
+        print(f"[STT] VAD kept {kept / WHISPER_SAMPLE_RATE:.1f}s of {len(audio) / WHISPER_SAMPLE_RATE:.1f}s "
+              f"in {len(chunks)} chunk(s)")
+        return chunks
 
     # ---------------- Chatbot (RAG query) ----------------
     def query_chatbot(self, question, target_language="en"):
@@ -82,64 +228,140 @@ class TeacherChatbot:
 
     # ---------------- TTS ----------------
     def tts(self, text, target_language="en"):
-        client = Murf(api_key=self.murf_api_key)
+        local_file, _ = self.synthesize(text, target_language=target_language)
+        return local_file
+
+    def synthesize(self, text, target_language="en"):
+        """
+        Murf TTS for `text`; returns (local WAV path, duration in seconds or None).
+        Repeated (text, voice) pairs are served from the TTS cache.
+        """
         voice_id = self.voice_map.get(target_language, self.voice_map["en"])
+        cached = self.tts_cache.get(text, voice_id)
+        if cached:
+            path, duration = cached
+            return Path(path), duration
+
+        client = murf_client(self.murf_api_key)
         response = client.text_to_speech.generate(text=text, voice_id=voice_id)
         audio_url = response.audio_file
-        
-        local_file = OUTPUT_DIR / f"{uuid.uuid4()}.wav"
-        r = requests.get(audio_url)
-        with open(local_file, "wb") as f:
-            f.write(r.content)
-            
-        return local_file
 
+        r = http_session().get(audio_url)
+        r.raise_for_status()
+        duration = getattr(response, "audio_length_in_seconds", None) or wav_duration(io.BytesIO(r.content))
+        local_file = self.tts_cache.put(text, voice_id, r.content, duration=duration)
+        return Path(local_file), duration
 
+    # ---------------- Segmented TTS ----------------
+    def split_for_tts(self, text, target_language="en"):
+        """
+        Sentence segments for TTS. Split before clean_text, which drops "!" and "?";
+        clean_text also drops non-ASCII, so Tamil is left as-is.
+        """
+        segments = []
+        for sentence in split_sentences(text):
+            if target_language == "en":
+                sentence = clean_text(sentence)
+            # Fold very short sentences into the previous one to save round trips
+            if segments and len(sentence) < TTS_SEGMENT_MIN_CHARS:
+                segments[-1] = f"{segments[-1]} {sentence}"
+            else:
+                segments.append(sentence)
+        return segments
 
-    # ---------------- Full pipeline ----------------
-    def pipeline(self, audio_path, language_hint=None):
-        print(f"\n{'='*60}")
-        print(f"[Pipeline] Starting pipeline...")
-        
-        question, detected_language = self.stt(audio_path, language_hint=language_hint)
-        print(f"[Pipeline] Question: {question}")
-        
-        answer_language = detected_language or "en"
-        answer, emotion = self.query_chatbot(question, target_language=answer_language)
-        print(f"[Pipeline] Answer: {answer[:100]}...")
-        
-        tts_file = self.tts(answer, target_language=answer_language)
-        print(f"[Pipeline] TTS generated: {tts_file}")
+    async def iter_tts_segments(self, text, target_language="en", max_parallel=None, wait=True):
+        """
+        Synthesizes sentence segments on the TTS stage, at most `max_parallel`
+        of them queued at once, and yields them in order, each as soon as it
+        and every earlier segment are done. With `wait=False` a full TTS
+        stage raises StageSaturated.
+        """
+        segments = self.split_for_tts(text, target_language)
+        limit = max(1, max_parallel or TTS_SEGMENT_PARALLELISM)
+        tts = self.stages["tts"]
+        jobs = []
+
+        def start(index):
+            jobs.append(asyncio.ensure_future(
+                tts.run_async(self.synthesize, segments[index], target_language, wait=wait)
+            ))
+
+        start_time = 0.0
+        try:
+            for index in range(min(limit, len(segments))):
+                start(index)
+            for index, segment in enumerate(segments):
+                local_file, duration = await jobs[index]
+                if len(jobs) < len(segments):
+                    start(len(jobs))
+                yield {
+                    "index": index,
+                    "text": segment,
+                    "audio_url": f"/audio/{Path(local_file).name}",
+                    "start_time": round(start_time, 3),
+                    "duration": round(duration, 3) if duration else None,
+                }
+                start_time += duration or 0.0
+        finally:
+            for job in jobs:
+                job.cancel()
+
+    async def tts_segments(self, text, target_language="en", max_parallel=None, wait=True):
+        """
+        Segmented TTS: returns a manifest with the ordered playlist and
+        per-segment start times and durations. The manifest is only returned,
+        never written; the audio it points to lives in the TTS cache.
+        """
+        segments = [s async for s in self.iter_tts_segments(text, target_language, max_parallel, wait)]
+        return self._segment_manifest(segments, target_language)
 
-        # ---------------- Generate images if enabled ----------------
+    @staticmethod
+    def _segment_manifest(segments, target_language):
+        return {
+            "id": str(uuid.uuid4()),
+            "language": target_language,
+            "segments": [{k: v for k, v in s.items() if k != "path"} for s in segments],
+            "total_duration": round(sum(s["duration"] or 0.0 for s in segments), 3),
+        }
+
+    # ---------------- Images ----------------
+    @staticmethod
+    def _image_url_entry(img):
+        # Path is already relative (e.g., static/generated_images/xxx.png)
+        # Just ensure forward slashes and add leading /
+        path_str = str(img["path"]).replace("\\", "/")
+        if not path_str.startswith("/"):
+            path_str = "/" + path_str
+        print(f"[Pipeline] Image {img['step']}: {path_str} (start: {img.get('start_time', 0)}s, duration: {img.get('duration', 3)}s)")
+        return {
+            "url": path_str,
+            "description": img["description"],
+            "step": img["step"],
+            "start_time": img.get("start_time", 0),
+            "duration": img.get("duration", 3.0)
+        }
+
+    def generate_image_urls(self, answer, on_image=None):
+        """
+        Generates teaching images for `answer` and returns them as frontend URLs.
+        `on_image` is called with each URL entry as soon as that image is saved.
+        """
         image_urls = []
         print(f"[Pipeline] Image generator available: {self.image_generator is not None}")
-        
+
         if self.image_generator:
             try:
                 print(f"[Pipeline] 🎨 Starting image generation...")
                 print(f"[Pipeline] Answer text for analysis: '{answer}'")
-                
-                images = self.image_generator.generate_images_for_teaching(answer)
-                print(f"[Pipeline] Generated {len(images)} images")
-                
-                # Convert file paths to URLs for frontend
-                for img in images:
-                    # Path is already relative (e.g., static/generated_images/xxx.png)
-                    # Just ensure forward slashes and add leading /
-                    path_str = str(img["path"]).replace("\\", "/")
-                    if not path_str.startswith("/"):
-                        path_str = "/" + path_str
-                    
-                    image_urls.append({
-                        "url": path_str,
-                        "description": img["description"],
-                        "step": img["step"],
-                        "start_time": img.get("start_time", 0),
-                        "duration": img.get("duration", 3.0)
-                    })
-                    print(f"[Pipeline] Image {img['step']}: {path_str} (start: {img.get('start_time', 0)}s, duration: {img.get('duration', 3)}s)")
-                
+
+                def saved(img):
+                    # Convert file paths to URLs for frontend
+                    entry = self._image_url_entry(img)
+                    image_urls.append(entry)
+                    if on_image:
+                        on_image(entry)
+
+                self.image_generator.generate_images_for_teaching(answer, on_image=saved)
                 print(f"[Pipeline] ✅ Successfully generated {len(image_urls)} image URLs")
             except Exception as e:
                 print(f"[Pipeline] ❌ Error generating images: {e}")
@@ -149,13 +371,386 @@ class TeacherChatbot:
         else:
             print(f"[Pipeline] ⚠️ Image generator not initialized, skipping images")
 
+        return image_urls
+
+    def start_image_job(self, answer):
+        """
+        Generates images for `answer` in the background and returns the job
+        at once. Images appear on the job as they finish; their start_time
+        is relative to the start of the answer's audio, as before.
+        """
+        job = self.image_jobs.create(answer)
+        try:
+            self.stages["images"].submit(self._run_image_job, job)
+        except StageSaturated:
+            self.image_jobs.update(job, state="rejected", error="Image generation is busy")
+        return job
+
+    def _run_image_job(self, job):
+        self.image_jobs.update(job, state="running")
+        try:
+            self.generate_image_urls(job.answer, on_image=lambda entry: self.image_jobs.update(job, image=entry))
+            self.image_jobs.update(job, state="done")
+        except Exception as e:
+            self.image_jobs.update(job, state="failed", error=str(e))
+
+    # ---------------- Full pipeline ----------------
+    def pipeline(self, audio, language_hint=None):
+        """Blocking `pipeline_async` for scripts without an event loop."""
+        return asyncio.run(self.pipeline_async(audio, language_hint=language_hint))
+
+    def _prefetch_on_text(self, prefetches, timeline):
+        """
+        `on_text` callback for stt: starts retrieval for each new partial
+        transcript on the LLM pool. It runs on the STT worker, so it never
+        waits for a slot; when the LLM stage is full that prefetch is skipped.
+        """
+        def on_text(text_so_far):
+            question_so_far = clean_text(text_so_far)
+            if question_so_far and question_so_far not in prefetches:
+                try:
+                    prefetches[question_so_far] = self.stages["llm"].submit(
+                        self._timed_prefetch, question_so_far, timeline
+                    )
+                except StageSaturated:
+                    return
+                timeline.start("retrieval")
+        return on_text
+
+    @staticmethod
+    def _segment_entries(results):
+        """Playlist entries for (sentence, audio file, duration) in answer order."""
+        segments, start_time = [], 0.0
+        for index, (sentence, local_file, duration) in enumerate(results):
+            segments.append({
+                "index": index,
+                "text": sentence,
+                "path": Path(local_file),
+                "audio_url": f"/audio/{Path(local_file).name}",
+                "start_time": round(start_time, 3),
+                "duration": round(duration, 3) if duration else None,
+            })
+            start_time += duration or 0.0
+        return segments
+
+    def _timed_prefetch(self, question, timeline):
+        try:
+            self.rag.prefetch(question)
+        finally:
+            timeline.end("retrieval")
+
+    def _timed_synthesize(self, sentence, target_language, timeline):
+        try:
+            result = self.synthesize(sentence, target_language=target_language)
+            timeline.mark("first_audio")
+            return result
+        finally:
+            timeline.end("tts")
+
+    def _joined_answer_audio(self, segments, answer, target_language):
+        """
+        One WAV for the whole answer, stitched from the sentence segments and
+        kept in the TTS cache. Falls back to synthesizing the full answer if
+        the segments can't be joined (not WAV, or different formats).
+        """
+        if len(segments) == 1:
+            return segments[0]["path"]
+        if segments:
+            try:
+                params, frames = None, []
+                for segment in segments:
+                    with wave.open(str(segment["path"]), "rb") as w:
+                        if params is not None and w.getparams()[:3] != params[:3]:
+                            raise wave.Error("segments differ in format")
+                        params = params or w.getparams()
+                        frames.append(w.readframes(w.getnframes()))
+                buf = io.BytesIO()
+                with wave.open(buf, "wb") as out:
+                    out.setparams(params)
+                    out.writeframes(b"".join(frames))
+                voice_id = self.voice_map.get(target_language, self.voice_map["en"])
+                duration = sum(s["duration"] or 0.0 for s in segments)
+                # Keyed by the segment texts, so it is never confused with a one-shot synthesis of `answer`
+                key_text = "\n".join(s["text"] for s in segments)
+                return Path(self.tts_cache.put(key_text, voice_id, buf.getvalue(), duration=duration))
+            except (wave.Error, EOFError, OSError) as e:
+                print(f"[Pipeline] ⚠️ Could not join sentence audio ({e}), synthesizing the full answer")
+        return self.tts(answer, target_language=target_language)
+
+    async def pipeline_async(self, audio, language_hint=None, segmented=False, background_images=None):
+        """
+        Overlapping pipeline: stages start as soon as their input exists
+        instead of waiting for the previous stage to finish, each on its own
+        bounded worker pool so the event loop stays free.
+
+        - Each time Whisper finishes a segment, retrieval for the transcript
+          so far is started on the LLM pool, so the query for the final
+          question usually finds its embedding and chunks already cached.
+        - The answer is streamed from the LLM and every finished sentence
+          goes to TTS right away.
+        - Image generation starts when the answer is complete and runs
+          alongside the remaining TTS.
+
+        Raises StageSaturated if the STT queue is full. `audio` is a path or
+        decoded samples, as for `stt`. The result has the answer audio as
+        one file in "audio_url", STT queue and decode times in "timings",
+        and a "timeline" with each stage's start/end (seconds since the
+        request began) and the time saved by overlapping them.
+        With `segmented`, "audio_url" is the first sentence and
+        "audio_segments" the manifest of all of them (see tts_segments);
+        it still returns only once every sentence is ready, /ask/stream
+        starts playback earlier.
+
+        With `background_images` (default IMAGES_IN_BACKGROUND) the result
+        comes back as soon as the audio is ready, with "images" empty and an
+        "image_job_id" to poll or subscribe to.
+        """
+        if background_images is None:
+            background_images = IMAGES_IN_BACKGROUND
+        timeline = StageTimeline()
+        print(f"\n{'='*60}")
+        print(f"[Pipeline] Starting pipeline...")
+
+        # ---------------- STT, with retrieval started on partial transcripts ----------------
+        prefetches = {}
+        timings = {}
+        timeline.start("stt")
+        question, detected_language = await self.stages["stt"].run_async(
+            self.stt, audio, language_hint=language_hint, timings=timings,
+            on_text=self._prefetch_on_text(prefetches, timeline), wait=False, stage_timings=timings,
+        )
+        timeline.end("stt")
+        print(f"[Pipeline] Question: {question}")
+
+        answer_language = detected_language or "en"
+        question_cleaned = clean_text(question)
+        if question_cleaned in prefetches:
+            # Already running since the last segment came in; let it finish so the query hits the cache
+            await asyncio.wrap_future(prefetches[question_cleaned])
+            timeline.mark("retrieval_reused")
+
+        # ---------------- LLM streamed into per-sentence TTS ----------------
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        sentences = SentenceBuffer(min_chars=TTS_SEGMENT_MIN_CHARS)
+        tts_jobs = []   # (sentence, task) in answer order
+        image_task = None
+
+        def start_tts(new_sentences):
+            for sentence in new_sentences:
+                if answer_language == "en":
+                    sentence = clean_text(sentence)
+                if sentence:
+                    timeline.start("tts")
+                    tts_jobs.append((sentence, asyncio.ensure_future(self.stages["tts"].run_async(
+                        self._timed_synthesize, sentence, answer_language, timeline
+                    ))))
+
+        try:
+            timeline.start("llm")
+            llm_task = asyncio.ensure_future(self.stages["llm"].run_async(
+                self._stream_llm, question_cleaned, answer_language, loop, queue, stop
+            ))
+            parts = []
+            while True:
+                kind, value = await queue.get()
+                if kind == "token":
+                    timeline.mark("first_token")
+                    parts.append(value)
+                    start_tts(sentences.feed(value))
+                elif kind == "error":
+                    raise RuntimeError(value)
+                else:
+                    break
+            await llm_task
+            start_tts(sentences.flush())
+            timeline.end("llm")
+            answer = "".join(parts).strip()
+            emotion = "neutral"
+            print(f"[Pipeline] Answer: {answer[:100]}...")
+
+            # ---------------- Images alongside the remaining TTS ----------------
+            image_job = None
+            if background_images:
+                image_job = self.start_image_job(answer)
+            else:
+                timeline.start("images")
+                image_task = asyncio.ensure_future(self.stages["images"].run_async(self.generate_image_urls, answer))
+
+            segments = self._segment_entries([(sentence, *await task) for sentence, task in tts_jobs])
+            if segmented:
+                tts_result = self._segment_manifest(segments, answer_language)
+                print(f"[Pipeline] TTS generated: {len(segments)} segment(s)")
+            else:
+                tts_result = await self.stages["tts"].run_async(
+                    self._joined_answer_audio, segments, answer, answer_language
+                )
+                print(f"[Pipeline] TTS generated: {tts_result}")
+
+            image_urls = []
+            if image_task is not None:
+                image_urls = await image_task
+                timeline.end("images")
+        finally:
+            # On failure or cancellation: stop the LLM producer and drop pending work
+            stop.set()
+            for _, task in tts_jobs:
+                task.cancel()
+            if image_task is not None:
+                image_task.cancel()
+
+        result_timeline = timeline.to_dict()
+        print(f"[Pipeline] Took {result_timeline['wall_seconds']:.2f}s, "
+              f"{result_timeline['overlap_saved_seconds']:.2f}s saved by overlapping stages")
         print(f"{'='*60}\n")
 
-        return {
+        result = {
             "question": question,
             "answer": answer,
             "language": answer_language,
-            "audio_url": str(tts_file),
             "emotion": emotion,
-            "images": image_urls  # New field with image URLs
-        }
\ No newline at end of file
+            "images": image_urls,
+            "timings": timings,
+            "timeline": result_timeline,
+        }
+        if image_job is not None:
+            result["image_job_id"] = image_job.id
+        if segmented:
+            result["audio_url"] = segments[0]["audio_url"] if segments else None
+            result["audio_segments"] = tts_result
+        else:
+            result["audio_url"] = str(tts_result)
+        return result
+
+    # ---------------- Streaming pipeline ----------------
+    async def transcribe_async(self, audio, language_hint=None, timings=None):
+        """STT on the bounded STT pool; raises StageSaturated if its queue is full."""
+        return await self.stages["stt"].run_async(
+            self.stt, audio, language_hint=language_hint, timings=timings, wait=False, stage_timings=timings
+        )
+
+    def _stream_llm(self, question, target_language, loop, queue, stop):
+        """
+        Runs on the LLM pool: forwards streamed answer pieces into an asyncio
+        queue until the answer ends or `stop` is set (the listener went away).
+        """
+        try:
+            pieces = self.rag.query_stream(clean_text(question), target_language=target_language)
+            for piece in pieces:
+                if stop.is_set():
+                    pieces.close()   # ends the LLM stream instead of reading it to the end
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, ("token", piece))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", str(e)))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, ("end", None))
+
+    async def _sentence_audio(self, index, sentence, target_language):
+        try:
+            tts_file, duration = await self.stages["tts"].run_async(
+                self.synthesize, sentence, target_language=target_language
+            )
+            audio_url = f"/audio/{Path(tts_file).name}"
+        except Exception as e:
+            print(f"[Pipeline] ❌ TTS failed for sentence {index}: {e}")
+            audio_url, duration = None, None
+        return {"index": index, "text": sentence, "audio_url": audio_url, "duration": duration}
+
+    async def stream_answer(self, question, answer_language="en"):
+        """
+        Async generator of (event, data) pairs for one question:
+        "token" for every LLM piece, "sentence" (in order) once a sentence's
+        audio is ready, "image" per generated image as soon as it is saved,
+        and a final "done". Each sentence is sent to TTS as soon as the LLM
+        finishes it; images are made once the answer is complete, alongside
+        the remaining sentence audio.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        llm_task = asyncio.ensure_future(
+            self.stages["llm"].run_async(self._stream_llm, question, answer_language, loop, queue, stop)
+        )
+        sentences = SentenceBuffer()
+        audio_tasks = []   # one per sentence, in answer order
+        next_sentence = 0
+        parts = []
+
+        def start_audio(new_sentences):
+            for sentence in new_sentences:
+                audio_tasks.append(asyncio.ensure_future(
+                    self._sentence_audio(len(audio_tasks), sentence, answer_language)
+                ))
+
+        get_task = None
+        image_task = None
+        answer = None
+        try:
+            while True:
+                if answer is not None and next_sentence == len(audio_tasks) and image_task.done() \
+                        and (get_task is None or not get_task.done()) and queue.empty():
+                    break
+                get_task = get_task or asyncio.ensure_future(queue.get())
+                waiting = {get_task}
+                if next_sentence < len(audio_tasks):
+                    waiting.add(audio_tasks[next_sentence])
+                if image_task is not None and not image_task.done():
+                    waiting.add(image_task)
+                await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                # Emit finished sentence audio in order, without waiting for the whole answer
+                while next_sentence < len(audio_tasks) and audio_tasks[next_sentence].done():
+                    yield "sentence", audio_tasks[next_sentence].result()
+                    next_sentence += 1
+
+                if get_task.done():
+                    kind, value = get_task.result()
+                    get_task = None
+                    if kind == "token":
+                        parts.append(value)
+                        yield "token", {"text": value}
+                        start_audio(sentences.feed(value))
+                    elif kind == "image":
+                        yield "image", value
+                    elif kind == "error":
+                        yield "error", {"detail": value}
+                    else:
+                        await llm_task
+                        start_audio(sentences.flush())
+                        answer = "".join(parts).strip()
+                        # Images are made alongside the remaining sentence audio and sent as each is saved
+                        image_task = asyncio.ensure_future(self.stages["images"].run_async(
+                            self.generate_image_urls, answer,
+                            on_image=lambda entry: loop.call_soon_threadsafe(queue.put_nowait, ("image", entry)),
+                        ))
+
+            image_task.result()
+            yield "done", {"answer": answer, "language": answer_language, "emotion": "neutral"}
+        finally:
+            # On disconnect: stop the LLM producer and drop everything still pending
+            stop.set()
+            if get_task is not None:
+                get_task.cancel()
+            for task in audio_tasks:
+                task.cancel()
+            if image_task is not None:
+                image_task.cancel()
+
+    def cache_stats(self):
+        stats = {"tts": self.tts_cache.stats()}
+        if "rag" in self._components:
+            # Don't load the RAG system just to report on it
+            stats.update(self._components["rag"].cache_stats())
+        if self._components.get("image_generator") is not None:
+            generator = self._components["image_generator"]
+            stats["images"] = generator.image_cache.stats()
+            stats["image_plans"] = generator.plan_cache.stats()
+        return stats
+
+    def stage_stats(self):
+        stats = {name: pool.stats() for name, pool in self.stages.items()}
+        if "stt_model" in self._components:
+            stats["stt"]["models"] = self._components["stt_model"].stats()
+        return stats
@@ -0,0 +1,87 @@
+import re
+import unicodedata
+
+# ----------------- SYMBOL MAP -----------------
+SYMBOL_MAP = {
+    '+': 'plus',
+    '-': 'minus',
+    '*': 'times',
+    '/': 'divided by',
+    '=': 'equals',
+    '%': 'percent',
+    '>': 'greater than',
+    '<': 'less than',
+    '&': 'and',
+    '@': 'at',
+    '#': 'number',
+    '$': 'dollar',
+    '^': 'caret',
+    '√': 'square root',
+}
+
+_inflect_engine = None
+
+
+def _number_engine():
+    """inflect is imported on first use so importing this module stays cheap."""
+    global _inflect_engine
+    if _inflect_engine is None:
+        import inflect
+        _inflect_engine = inflect.engine()
+    return _inflect_engine
+
+
+# ----------------- CLEAN TEXT -----------------
+def clean_text(text):
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    for symbol, word in SYMBOL_MAP.items():
+        text = text.replace(symbol, f' {word} ')
+
+    def replace_digits(match):
+        num = int(match.group(0))
+        return _number_engine().number_to_words(num)
+    text = re.sub(r'\b\d+\b', replace_digits, text)
+
+    text = re.sub(r'[^\w\s.,\'-]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    if not text:
+        return "Let's try again."
+    return text
+
+
+# ----------------- SENTENCES -----------------
+# End of sentence: . ! ? (or the Devanagari danda) followed by whitespace.
+# Digits around a dot ("3.5") do not match because no whitespace follows.
+SENTENCE_END = re.compile(r'(?<=[.!?।])\s+')
+
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_END.split(text) if s.strip()]
+
+
+class SentenceBuffer:
+    """Collects streamed text and hands back sentences as soon as they are complete."""
+
+    def __init__(self, min_chars=20):
+        # Very short pieces ("Yes!") are merged into the next sentence
+        self.min_chars = min_chars
+        self._text = ""
+
+    def feed(self, piece):
+        self._text += piece
+        sentences = []
+        while True:
+            match = None
+            for candidate in SENTENCE_END.finditer(self._text):
+                if candidate.start() >= self.min_chars:
+                    match = candidate
+                    break
+            if match is None:
+                return sentences
+            sentence, self._text = self._text[:match.start()].strip(), self._text[match.end():]
+            if sentence:
+                sentences.append(sentence)
+
+    def flush(self):
+        rest, self._text = self._text.strip(), ""
+        return [rest] if rest else []
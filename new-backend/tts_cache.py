@@ -0,0 +1,166 @@
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ingest_manifest import atomic_write_json
+
+FILE_PREFIX = "tts-"
+
+
+def normalize_tts_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def tts_cache_key(text: str, voice_id: str, audio_format: str = "wav") -> str:
+    payload = f"{audio_format}\0{voice_id}\0{normalize_tts_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed store of synthesized speech.
+
+    Files are named by a hash of (normalized text, voice id, format) and
+    live in `folder` next to the other audio, so a cached file is served by
+    the same /audio route. The total size is capped at `max_bytes`; the
+    least recently used files are deleted first, except files returned in
+    the last `grace_seconds`, which a client may still be about to fetch.
+    Sizes, durations and the LRU order are kept in `index_path`, which
+    defaults to a file next to `folder` so it is not served with the audio.
+    """
+
+    def __init__(self, folder: str, max_bytes: int, index_path: Optional[str] = None,
+                 grace_seconds: float = 600.0):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.grace_seconds = grace_seconds
+        self.index_path = index_path or os.path.normpath(folder) + "_tts_cache.json"
+        # key -> {"file", "size", "duration", "voice_id"}, least recently used first
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._handed_out: Dict[str, float] = {}   # key -> when its path was last returned
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        self._load()
+
+    # ---------------- Persistence ----------------
+    def _load(self) -> None:
+        index_path = self.index_path
+        legacy_path = os.path.join(self.folder, "tts_cache.json")
+        if not os.path.exists(index_path) and os.path.exists(legacy_path):
+            # Older versions kept the index inside the served folder
+            index_path = legacy_path
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for key, entry in data.get("entries", []):
+                    if os.path.exists(os.path.join(self.folder, entry["file"])):
+                        self.entries[key] = entry
+                        self.total_bytes += entry["size"]
+            except Exception as e:
+                print(f"[WARNING] Could not read TTS cache index, starting fresh: {e}")
+                self.entries, self.total_bytes = OrderedDict(), 0
+        if os.path.exists(legacy_path):
+            self._save_locked()
+            try:
+                os.remove(legacy_path)
+            except OSError:
+                pass
+
+        # Files written before a crash but never indexed
+        known = {entry["file"] for entry in self.entries.values()}
+        for name in os.listdir(self.folder):
+            if name.startswith(FILE_PREFIX) and name not in known:
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+
+    def _save_locked(self) -> None:
+        try:
+            atomic_write_json(self.index_path, {"entries": list(self.entries.items())})
+        except Exception as e:
+            print(f"[WARNING] Could not save TTS cache index: {e}")
+
+    # ---------------- Lookup ----------------
+    def get(self, text: str, voice_id: str, audio_format: str = "wav") -> Optional[Tuple[str, Optional[float]]]:
+        """Returns (path, duration) of the cached audio, or None."""
+        key = tts_cache_key(text, voice_id, audio_format)
+        with self._lock:
+            entry = self.entries.get(key)
+            path = os.path.join(self.folder, entry["file"]) if entry else None
+            if entry is None or not os.path.exists(path):
+                if entry is not None:
+                    # Deleted behind our back
+                    self.total_bytes -= self.entries.pop(key)["size"]
+                self.misses += 1
+                return None
+            # LRU order is persisted with the next put
+            self.entries.move_to_end(key)
+            self._handed_out[key] = time.monotonic()
+            self.hits += 1
+            return path, entry.get("duration")
+
+    def put(self, text: str, voice_id: str, data: bytes, duration: Optional[float] = None,
+            audio_format: str = "wav") -> str:
+        """Stores synthesized audio and returns its path."""
+        key = tts_cache_key(text, voice_id, audio_format)
+        name = f"{FILE_PREFIX}{key}.{audio_format}"
+        path = os.path.join(self.folder, name)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, prefix=".tmp-", suffix=f".{audio_format}")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous:
+                self.total_bytes -= previous["size"]
+            self.entries[key] = {"file": name, "size": len(data), "duration": duration, "voice_id": voice_id}
+            self.total_bytes += len(data)
+            self._handed_out[key] = time.monotonic()
+            self._evict_locked(keep=key)
+            self._save_locked()
+        return path
+
+    def _evict_locked(self, keep: str) -> None:
+        now = time.monotonic()
+        for key in list(self.entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            # Recently returned files may still be fetched; the cap is exceeded for a while instead
+            if key == keep or now - self._handed_out.get(key, float("-inf")) < self.grace_seconds:
+                continue
+            entry = self.entries.pop(key)
+            self._handed_out.pop(key, None)
+            self.total_bytes -= entry["size"]
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.folder, entry["file"]))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
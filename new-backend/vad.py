@@ -0,0 +1,100 @@
+"""
+Energy-based voice activity detection for the STT pre-pass.
+
+Recordings from the classroom frontend carry long silences before, after
+and between words. `prepare_speech` cuts those down so Whisper only
+decodes speech: leading and trailing silence is dropped, pauses longer
+than `max_pause_ms` are shortened to it, and the result is split at
+pauses into chunks no longer than Whisper's 30 s window (speech that
+runs longer without a pause is cut at the window length). Every speech
+region keeps `pad_ms` of context on both sides so word onsets and
+endings are not clipped. A clip without clearly quiet frames is not
+trimmed at all.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from audio_decode import WHISPER_SAMPLE_RATE
+
+FRAME_MS = 30
+WHISPER_WINDOW_SECONDS = 30.0
+
+
+def frame_energy_db(samples: np.ndarray, rate: int = WHISPER_SAMPLE_RATE, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """RMS level of each `frame_ms` frame, in dBFS."""
+    frame = max(1, rate * frame_ms // 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[: count * frame].reshape(count, frame).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+def speech_regions(samples: np.ndarray, rate: int = WHISPER_SAMPLE_RATE, margin_db: float = 12.0,
+                   min_db: float = -50.0, max_noise_db: float = -50.0, pad_ms: int = 200,
+                   min_speech_ms: int = 90) -> List[Tuple[int, int]]:
+    """
+    (start, end) sample ranges that contain speech. A frame is speech when it
+    is `margin_db` above the clip's noise floor (its quietest 10% of frames)
+    and above `min_db`. Bursts shorter than `min_speech_ms` (clicks) are ignored.
+    If the noise floor is above `max_noise_db` the clip has too little silence
+    to tell soft speech from it, and the whole clip is returned as one region.
+    """
+    levels = frame_energy_db(samples, rate)
+    if len(levels) == 0:
+        return []
+    noise_floor = float(np.percentile(levels, 10))
+    if noise_floor > max_noise_db:
+        return [(0, len(samples))]
+    voiced = levels > max(noise_floor + margin_db, min_db)
+
+    frame = max(1, rate * FRAME_MS // 1000)
+    pad = rate * pad_ms // 1000
+    min_frames = max(1, min_speech_ms // FRAME_MS)
+    regions = []
+    start = None
+    for i, is_voiced in enumerate(np.append(voiced, False)):
+        if is_voiced and start is None:
+            start = i
+        elif not is_voiced and start is not None:
+            if i - start >= min_frames:
+                begin, end = max(0, start * frame - pad), min(len(samples), i * frame + pad)
+                if regions and begin <= regions[-1][1]:
+                    regions[-1] = (regions[-1][0], end)
+                else:
+                    regions.append((begin, end))
+            start = None
+    return regions
+
+
+def prepare_speech(samples: np.ndarray, rate: int = WHISPER_SAMPLE_RATE, max_pause_ms: int = 500,
+                   max_chunk_seconds: float = WHISPER_WINDOW_SECONDS, **vad_options) -> List[np.ndarray]:
+    """
+    Speech-only chunks of `samples`, in order. Returns the whole clip as one
+    chunk if no speech is found, so a quiet recording is still transcribed.
+    """
+    regions = speech_regions(samples, rate, **vad_options)
+    if not regions:
+        return [samples]
+
+    pause = np.zeros(rate * max_pause_ms // 1000, dtype=samples.dtype)
+    max_chunk = int(max_chunk_seconds * rate)
+    chunks, current, current_len = [], [], 0
+    for index, (start, end) in enumerate(regions):
+        gap = min(start - regions[index - 1][1], len(pause)) if index else 0
+        # A region longer than the window has no pause to split at; cut it at the window length
+        for offset in range(start, end, max_chunk):
+            piece = samples[offset:min(end, offset + max_chunk)]
+            if current and current_len + gap + len(piece) > max_chunk:
+                chunks.append(np.concatenate(current))
+                current, current_len = [], 0
+                gap = 0
+            if gap:
+                current.append(pause[:gap])
+            current.append(piece)
+            current_len += gap + len(piece)
+            gap = 0
+    chunks.append(np.concatenate(current))
+    return chunks